@@ -0,0 +1,231 @@
+# Contributors Listed Below - COPYRIGHT 2016
+# [+] International Business Machines Corp.
+#
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied. See the License for the specific language governing
+# permissions and limitations under the License.
+
+import asyncio
+import threading
+import xml.etree.ElementTree as ET
+import dbus
+import dbus.bus
+from obmc.dbuslib.convert import to_native
+from obmc.dbuslib.introspection import IntrospectionNodeParser
+
+
+class GLibThread(object):
+    ''' Runs a GLib main loop in a daemon thread, so that dbus-python
+    can dispatch replies and signals without a GLib loop in the thread
+    running the asyncio event loop.
+    '''
+
+    def __init__(self):
+        self.mainloop = None
+        self.loop = None
+        self.thread = None
+
+    def start(self):
+        from dbus.mainloop.glib import DBusGMainLoop, threads_init
+        from gi.repository import GLib
+
+        if self.thread is not None:
+            return self.mainloop
+        threads_init()
+        self.mainloop = DBusGMainLoop()
+        self.loop = GLib.MainLoop()
+        self.thread = threading.Thread(
+            target=self.loop.run, name='glib-mainloop')
+        self.thread.daemon = True
+        self.thread.start()
+        return self.mainloop
+
+    def stop(self):
+        from gi.repository import GLib
+
+        if self.thread is None:
+            return
+        GLib.idle_add(self.loop.quit)
+        self.thread.join()
+        self.thread = None
+
+
+_glib_thread = GLibThread()
+
+
+def _resolve(future, result):
+    if not future.done():
+        future.set_result(result)
+
+
+def _reject(future, error):
+    if not future.done():
+        future.set_exception(error)
+
+
+class AsyncBus(object):
+    ''' An asyncio front end to a dbus-python connection.
+
+    Method calls are issued with call_async, and their reply handlers
+    complete asyncio futures through call_soon_threadsafe, so awaiting
+    a call never blocks the event loop.  The connection must be bound to
+    a GLib main loop running in some thread; see open_bus().
+
+    At most limit calls are in flight at once, across every coroutine
+    using the bus; further calls wait their turn.  Results are returned
+    as dbus types, or as plain Python types with native=True.
+    '''
+
+    def __init__(self, bus, limit=16):
+        self.bus = bus
+        self.limit = limit
+        self._semaphore = None
+
+    def _limiter(self):
+        # Created on first use, so that it binds to the running loop.
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.limit)
+        return self._semaphore
+
+    def _call(self, bus_name, object_path, interface, method, signature,
+              args, timeout):
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        def reply(*result):
+            if not result:
+                result = None
+            elif len(result) == 1:
+                result = result[0]
+            loop.call_soon_threadsafe(_resolve, future, result)
+
+        def error(e):
+            loop.call_soon_threadsafe(_reject, future, e)
+
+        self.bus.call_async(
+            bus_name, object_path, interface, method, signature, args,
+            reply, error, timeout=-1 if timeout is None else timeout)
+        return future
+
+    async def call(self, bus_name, object_path, interface, method,
+                   signature=None, args=(), timeout=None):
+        ''' Call method and return its reply: None, the single out
+        argument, or a tuple of them.  D-Bus errors are raised as
+        dbus.DBusException.
+        '''
+
+        async with self._limiter():
+            return await self._call(
+                bus_name, object_path, interface, method, signature,
+                tuple(args), timeout)
+
+    async def get(self, bus_name, object_path, interface, name,
+                  native=False):
+        value = await self.call(
+            bus_name, object_path, dbus.PROPERTIES_IFACE, 'Get', 'ss',
+            (interface, name))
+        return to_native(value) if native else value
+
+    async def get_all(self, bus_name, object_path, interface,
+                      native=False):
+        value = await self.call(
+            bus_name, object_path, dbus.PROPERTIES_IFACE, 'GetAll', 's',
+            (interface,))
+        return to_native(value) if native else value
+
+    async def set(self, bus_name, object_path, interface, name, value):
+        await self.call(
+            bus_name, object_path, dbus.PROPERTIES_IFACE, 'Set', 'ssv',
+            (interface, name, value))
+
+    async def get_all_many(self, requests, native=False,
+                           return_exceptions=False):
+        ''' Fetch the properties of many objects concurrently, within
+        the limit of the bus.
+
+        Arguments:
+        requests -- An iterable of (bus_name, object_path, interface).
+        return_exceptions -- As for asyncio.gather: return a failed
+            fetch's exception in place of its result rather than raise.
+
+        Returns the properties of each request, in the order given.
+        '''
+
+        return await asyncio.gather(
+            *[self.get_all(b, p, i, native) for b, p, i in requests],
+            return_exceptions=return_exceptions)
+
+    async def _introspect_node(self, bus_name, path, tag_match, intf_match):
+        try:
+            data = await self.call(
+                bus_name, path, dbus.INTROSPECTABLE_IFACE, 'Introspect')
+        except dbus.DBusException:
+            return None
+        return IntrospectionNodeParser(
+            ET.fromstring(data), tag_match, intf_match)
+
+    @staticmethod
+    def _discover_flat(path, parser):
+        items = {}
+        interfaces = list(parser.get_interfaces().keys())
+        if interfaces:
+            items[path] = {'interfaces': interfaces}
+        return items
+
+    async def _discover(self, bus_name, path, tag_match, intf_match,
+                        flat):
+        parser = await self._introspect_node(
+            bus_name, path, tag_match, intf_match)
+        if parser is None:
+            return {}
+        if flat:
+            return self._discover_flat(path, parser)
+        return await self.introspect(
+            bus_name, path, tag_match, intf_match, parser)
+
+    async def introspect(self, bus_name, path='/', tag_match=bool,
+                         intf_match=bool, parser=None):
+        ''' Crawl the objects of bus_name at and below path, as
+        IntrospectionParser.introspect does, introspecting the children
+        of each node concurrently.
+        '''
+
+        items = {}
+        if parser is None:
+            parser = await self._introspect_node(
+                bus_name, path, tag_match, intf_match)
+        if parser is None:
+            return {}
+        items.update(self._discover_flat(path, parser))
+
+        if path != '/':
+            path += '/'
+
+        flat = parser.recursive_binding()
+        results = await asyncio.gather(*[
+            self._discover(bus_name, path + k, tag_match, intf_match, flat)
+            for k in parser.get_children()])
+        for result in results:
+            items.update(result)
+
+        return items
+
+
+def open_bus(address=dbus.bus.BUS_SYSTEM, limit=16):
+    ''' Open a private connection to the bus at address (or one of the
+    dbus.bus.BUS_* constants), dispatched by a GLib main loop in a
+    shared background thread, and return an AsyncBus for it.
+    '''
+
+    mainloop = _glib_thread.start()
+    bus = dbus.bus.BusConnection(address, mainloop=mainloop)
+    return AsyncBus(bus, limit)
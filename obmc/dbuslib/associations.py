@@ -0,0 +1,154 @@
+# Contributors Listed Below - COPYRIGHT 2016
+# [+] International Business Machines Corp.
+#
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied. See the License for the specific language governing
+# permissions and limitations under the License.
+
+import functools
+
+
+class AssociationIndex(object):
+    ''' A bidirectional index of the associations declared by objects.
+
+    An object at owner path declares (forward, reverse, endpoint)
+    triples in the associations property of interface.  Each triple
+    adds an edge from owner to endpoint named forward, and an edge from
+    endpoint back to owner named reverse.  Edges are reference counted,
+    so an edge declared by both of its ends, or by several triples,
+    remains until every declaration is gone.
+
+    The index is maintained incrementally: set() and remove() touch
+    only the edges of the triples that changed, and endpoints() is
+    O(number of endpoints).  The properties_changed(),
+    interfaces_added() and interfaces_removed() handlers take the
+    arguments of the corresponding D-Bus signals, so they can be passed
+    to add_signal_receiver() directly (with path_keyword='path' for
+    PropertiesChanged).
+    '''
+
+    def __init__(self, interface=None, property_name='associations'):
+        if interface is None:
+            from obmc.dbuslib.enums import OBMC_ASSOCIATIONS_IFACE
+            interface = OBMC_ASSOCIATIONS_IFACE
+        self.interface = interface
+        self.property_name = property_name
+        # owner path -> frozenset of (forward, reverse, endpoint)
+        self._owners = {}
+        # path -> relation -> endpoint -> reference count
+        self._edges = {}
+        self._listeners = {}
+
+    def _link(self, path, relation, endpoint):
+        relations = self._edges.setdefault(path, {})
+        endpoints = relations.setdefault(relation, {})
+        endpoints[endpoint] = endpoints.get(endpoint, 0) + 1
+
+    def _unlink(self, path, relation, endpoint):
+        relations = self._edges[path]
+        endpoints = relations[relation]
+        count = endpoints[endpoint] - 1
+        if count:
+            endpoints[endpoint] = count
+            return
+        del endpoints[endpoint]
+        if not endpoints:
+            del relations[relation]
+            if not relations:
+                del self._edges[path]
+
+    def _apply(self, owner, triples, link):
+        for forward, reverse, endpoint in triples:
+            if forward:
+                link(owner, forward, endpoint)
+            if reverse:
+                link(endpoint, reverse, owner)
+
+    def set(self, owner, associations):
+        ''' Replace the associations declared by owner. '''
+
+        new = frozenset(tuple(x) for x in associations)
+        old = self._owners.get(owner, frozenset())
+        self._apply(owner, old - new, self._unlink)
+        self._apply(owner, new - old, self._link)
+        if new:
+            self._owners[owner] = new
+        else:
+            self._owners.pop(owner, None)
+
+    def remove(self, owner):
+        ''' Drop the associations declared by owner. '''
+
+        self._apply(owner, self._owners.pop(owner, ()), self._unlink)
+
+    def ingest(self, managed):
+        ''' Add the associations found in the result of an
+        ObjectManager GetManagedObjects call.
+        '''
+
+        for path, interfaces in managed.items():
+            self.interfaces_added(path, interfaces)
+
+    def endpoints(self, path, relation):
+        ''' The paths associated with path via relation. '''
+
+        return list(self._edges.get(path, {}).get(relation, ()))
+
+    def relations(self, path):
+        ''' The relation names with at least one endpoint at path. '''
+
+        return list(self._edges.get(path, ()))
+
+    def associations(self, owner):
+        ''' The (forward, reverse, endpoint) triples declared by owner. '''
+
+        return sorted(self._owners.get(owner, ()))
+
+    def __contains__(self, path):
+        return path in self._edges
+
+    def __len__(self):
+        return len(self._edges)
+
+    def properties_changed(self, interface, changed, invalidated=None,
+                           path=None):
+        if interface == self.interface and self.property_name in changed:
+            self.set(path, changed[self.property_name])
+
+    def interfaces_added(self, path, interfaces):
+        properties = interfaces.get(self.interface)
+        if properties is not None:
+            self.set(path, properties.get(self.property_name, []))
+
+    def interfaces_removed(self, path, interfaces):
+        if self.interface in interfaces:
+            self.remove(path)
+
+    def watch(self, path, obj):
+        ''' Index the associations of the local DbusProperties obj at
+        path, and follow changes to them.
+        '''
+
+        self.unwatch(path, obj)
+        self.interfaces_added(path, obj.properties)
+        listener = functools.partial(self._object_changed, path)
+        obj.add_change_listener(listener)
+        self._listeners[path] = listener
+
+    def unwatch(self, path, obj):
+        listener = self._listeners.pop(path, None)
+        if listener is not None:
+            obj.remove_change_listener(listener)
+        self.remove(path)
+
+    def _object_changed(self, path, interface, changed):
+        self.properties_changed(interface, changed, path=path)
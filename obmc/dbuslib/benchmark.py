@@ -0,0 +1,437 @@
+# Contributors Listed Below - COPYRIGHT 2016
+# [+] International Business Machines Corp.
+#
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied. See the License for the specific language governing
+# permissions and limitations under the License.
+
+''' End to end benchmarks of the D-Bus bindings.
+
+Launches a private dbus-daemon, exports synthetic objects from a server
+process built on DbusObjectManager and DbusProperties, and measures
+from a client connection:
+
+  Get, GetAll and Set throughput and latency
+  PropertiesChanged emission and delivery rate
+  GetManagedObjects latency
+  the time for IntrospectionParser to crawl the whole bus name
+
+Results are printed (or written to --output) as JSON for comparison
+between commits:
+
+  python -m obmc.dbuslib.benchmark --objects 100 1000 10000
+'''
+
+import argparse
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import dbus
+import dbus.bus
+import dbus.service
+from obmc.dbuslib.bindings import DbusObjectManager, DbusProperties
+from obmc.dbuslib.introspection import IntrospectionParser
+from obmc.dbuslib.signalpolicy import monotonic
+
+BENCH_BUS_NAME = 'org.openbmc.Benchmark'
+BENCH_IFACE = 'org.openbmc.Benchmark'
+BENCH_ROOT = '/xyz/openbmc_project/benchmark'
+BENCH_CONTROL_PATH = '/org/openbmc/Benchmark'
+
+
+class PrivateBus(object):
+    ''' A dbus-daemon --session listening on a socket in a temporary
+    directory, for the lifetime of the context.
+    '''
+
+    def __init__(self, daemon='dbus-daemon'):
+        self.daemon = daemon
+        self.tmpdir = None
+        self.process = None
+        self.address = None
+
+    def start(self):
+        self.tmpdir = tempfile.mkdtemp(prefix='obmc-bench-')
+        socket = os.path.join(self.tmpdir, 'bus')
+        self.process = subprocess.Popen(
+            [self.daemon, '--session', '--nofork', '--nopidfile',
+             '--print-address', '--address=unix:path=' + socket],
+            stdout=subprocess.PIPE)
+        self.address = self.process.stdout.readline().decode().strip()
+        if not self.address:
+            self.stop()
+            raise RuntimeError('dbus-daemon did not start')
+        return self.address
+
+    def stop(self):
+        if self.process is not None:
+            self.process.terminate()
+            self.process.wait()
+            self.process.stdout.close()
+            self.process = None
+        if self.tmpdir is not None:
+            shutil.rmtree(self.tmpdir, ignore_errors=True)
+            self.tmpdir = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+        return False
+
+
+def object_path(index):
+    return '{}/object{}'.format(BENCH_ROOT, index)
+
+
+def interface_name(index):
+    return '{}.Interface{}'.format(BENCH_IFACE, index)
+
+
+def make_properties(index, interfaces, properties):
+    result = {}
+    for i in range(0, interfaces):
+        props = {}
+        for p in range(0, properties):
+            # alternate numeric and string values
+            if p % 2:
+                props['Property{}'.format(p)] = 'value{}'.format(index)
+            else:
+                props['Property{}'.format(p)] = dbus.Int32(index)
+        result[interface_name(i)] = props
+    return result
+
+
+class BenchmarkControl(dbus.service.Object):
+    def __init__(self, conn, objects, loop):
+        super(BenchmarkControl, self).__init__(
+            conn=conn, object_path=BENCH_CONTROL_PATH)
+        self.objects = objects
+        self.loop = loop
+        self.counter = 0
+
+    @dbus.service.method(BENCH_IFACE, in_signature='u', out_signature='d')
+    def EmitSignals(self, count):
+        ''' Change a property count times, round robin across the
+        objects, and return the seconds taken to emit the signals.
+        '''
+
+        iface = interface_name(0)
+        start = monotonic()
+        for i in range(0, count):
+            self.counter += 1
+            obj = self.objects[i % len(self.objects)]
+            obj.Set(iface, 'Property0', dbus.Int32(self.counter))
+        return monotonic() - start
+
+    @dbus.service.method(BENCH_IFACE, in_signature='', out_signature='')
+    def Quit(self):
+        from gi.repository import GLib
+        GLib.idle_add(self.loop.quit)
+
+
+def serve(address, objects, interfaces, properties):
+    ''' Export the synthetic objects on the bus at address and run the
+    main loop until BenchmarkControl.Quit is called.
+    '''
+
+    from dbus.mainloop.glib import DBusGMainLoop
+    from gi.repository import GLib
+
+    bus = dbus.bus.BusConnection(address, mainloop=DBusGMainLoop())
+    loop = GLib.MainLoop()
+    manager = DbusObjectManager(conn=bus, object_path=BENCH_ROOT)
+    items = [(object_path(i), make_properties(i, interfaces, properties))
+             for i in range(0, objects)]
+    objs = DbusProperties.create_many(items, conn=bus)
+    manager.add_many(zip([x[0] for x in items], objs))
+    manager.unmask_signals()
+    for obj in objs:
+        obj.unmask_signals()
+    # Both must stay referenced while the loop runs.
+    control = BenchmarkControl(bus, objs, loop)
+    name = dbus.service.BusName(BENCH_BUS_NAME, bus)
+    loop.run()
+
+
+def _summary(latencies):
+    latencies = sorted(latencies)
+    n = len(latencies)
+    total = sum(latencies)
+    return {
+        'count': n,
+        'per_second': n / total if total else None,
+        'mean': total / n,
+        'p50': latencies[n // 2],
+        'p99': latencies[min(n - 1, int(n * 0.99))],
+        'max': latencies[-1],
+    }
+
+
+def _time_calls(func, args):
+    latencies = []
+    for a in args:
+        start = monotonic()
+        func(*a)
+        latencies.append(monotonic() - start)
+    return _summary(latencies)
+
+
+def _wait_for_name(bus, server, timeout):
+    deadline = monotonic() + timeout
+    while not bus.name_has_owner(BENCH_BUS_NAME):
+        if server.poll() is not None:
+            raise RuntimeError('benchmark server exited')
+        if monotonic() > deadline:
+            raise RuntimeError('benchmark server did not start')
+        time.sleep(0.05)
+
+
+def _measure_signals(bus, control, count, timeout):
+    from gi.repository import GLib
+
+    loop = GLib.MainLoop()
+    state = {'received': 0, 'last': None, 'emit': None, 'error': None,
+             'expired': False}
+
+    def received(*args):
+        state['received'] += 1
+        if state['received'] == count:
+            state['last'] = monotonic()
+            loop.quit()
+
+    def reply(seconds):
+        state['emit'] = seconds
+
+    def error(e):
+        state['error'] = str(e)
+        loop.quit()
+
+    def expire():
+        state['expired'] = True
+        loop.quit()
+        return False
+
+    match = bus.add_signal_receiver(
+        received, signal_name='PropertiesChanged',
+        dbus_interface=dbus.PROPERTIES_IFACE, bus_name=BENCH_BUS_NAME)
+    source = GLib.timeout_add(int(timeout * 1000), expire)
+    try:
+        start = monotonic()
+        control.EmitSignals(
+            dbus.UInt32(count), dbus_interface=BENCH_IFACE,
+            reply_handler=reply, error_handler=error,
+            timeout=timeout)
+        loop.run()
+    finally:
+        match.remove()
+        if not state['expired']:
+            GLib.source_remove(source)
+
+    # Drain the emit reply if the last signal arrived first.
+    context = loop.get_context()
+    deadline = monotonic() + timeout
+    while state['emit'] is None and state['error'] is None and \
+            monotonic() < deadline:
+        context.iteration(True)
+
+    result = {
+        'count': count,
+        'received': state['received'],
+        'emit_seconds': state['emit'],
+        'emit_per_second': count / state['emit'] if state['emit'] else None,
+        'delivered_per_second': None,
+    }
+    if state['last'] is not None:
+        result['delivered_per_second'] = count / (state['last'] - start)
+    if state['error'] is not None:
+        result['error'] = state['error']
+    return result
+
+
+def run(address, server, objects, interfaces, properties, calls, signals,
+        repeat, timeout):
+    ''' Measure the server exporting objects on the bus at address. '''
+
+    from dbus.mainloop.glib import DBusGMainLoop
+
+    bus = dbus.bus.BusConnection(address, mainloop=DBusGMainLoop())
+    try:
+        _wait_for_name(bus, server, timeout)
+
+        rand = random.Random(objects)
+        sample = [rand.randrange(0, objects)
+                  for x in range(0, min(calls, objects))]
+        proxies = dict(
+            (i, bus.get_object(
+                BENCH_BUS_NAME, object_path(i), introspect=False))
+            for i in set(sample))
+        targets = [proxies[sample[k % len(sample)]] for k in range(calls)]
+        iface = interface_name(0)
+        props = dbus.PROPERTIES_IFACE
+
+        def get(obj):
+            obj.Get(iface, 'Property1', dbus_interface=props)
+
+        def get_all(obj):
+            obj.GetAll(iface, dbus_interface=props)
+
+        def set_(obj, value):
+            obj.Set(iface, 'Property0', dbus.Int32(value),
+                    dbus_interface=props)
+
+        result = {
+            'objects': objects,
+            'interfaces': interfaces,
+            'properties': properties,
+            'get': _time_calls(get, [(x,) for x in targets]),
+            'get_all': _time_calls(get_all, [(x,) for x in targets]),
+            'set': _time_calls(
+                set_, [(x, -k - 1) for k, x in enumerate(targets)]),
+        }
+
+        control = bus.get_object(
+            BENCH_BUS_NAME, BENCH_CONTROL_PATH, introspect=False)
+        result['signals'] = _measure_signals(bus, control, signals, timeout)
+
+        manager = bus.get_object(BENCH_BUS_NAME, BENCH_ROOT, introspect=False)
+        result['get_managed_objects'] = _time_calls(
+            lambda: manager.GetManagedObjects(
+                dbus_interface=dbus.BUS_DAEMON_IFACE + '.ObjectManager',
+                timeout=timeout),
+            [()] * repeat)
+
+        parser = IntrospectionParser(BENCH_BUS_NAME, bus)
+        crawled = {}
+
+        def crawl():
+            crawled.update(parser.introspect('/'))
+
+        result['introspect_crawl'] = _time_calls(crawl, [()] * repeat)
+        result['introspect_crawl']['paths'] = len(crawled)
+
+        control.Quit(dbus_interface=BENCH_IFACE)
+        return result
+    finally:
+        bus.close()
+
+
+def _wait_exit(process, timeout):
+    deadline = monotonic() + timeout
+    while process.poll() is None and monotonic() < deadline:
+        time.sleep(0.05)
+
+
+def _commit():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', 'HEAD'],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            stderr=subprocess.STDOUT).decode().strip()
+    except Exception:
+        return None
+
+
+def benchmark(sizes, interfaces=2, properties=8, calls=2000, signals=10000,
+              repeat=3, timeout=120, daemon='dbus-daemon'):
+    ''' Run the benchmarks once for each number of objects in sizes,
+    each against a fresh private bus and server process.  Returns the
+    results as a JSON-serializable dict.
+    '''
+
+    package_root = os.path.dirname(os.path.dirname(os.path.dirname(
+        os.path.abspath(__file__))))
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(
+        x for x in (package_root, env.get('PYTHONPATH')) if x)
+
+    results = []
+    for objects in sizes:
+        with PrivateBus(daemon) as bus:
+            server = subprocess.Popen(
+                [sys.executable, '-m', 'obmc.dbuslib.benchmark',
+                 '--serve', bus.address,
+                 '--objects', str(objects),
+                 '--interfaces', str(interfaces),
+                 '--properties', str(properties)],
+                env=env)
+            try:
+                results.append(run(
+                    bus.address, server, objects, interfaces, properties,
+                    calls, signals, repeat, timeout))
+                _wait_exit(server, timeout)
+            finally:
+                if server.poll() is None:
+                    server.kill()
+                    server.wait()
+
+    return {
+        'meta': {
+            'commit': _commit(),
+            'python': sys.version.split()[0],
+            'dbus_python': getattr(dbus, '__version__', None),
+            'timestamp': time.time(),
+            'calls': calls,
+            'signals': signals,
+            'repeat': repeat,
+        },
+        'results': results,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Benchmark the obmc D-Bus bindings on a private bus.')
+    parser.add_argument(
+        '--objects', type=int, nargs='+', default=[100, 1000, 10000],
+        help='the numbers of objects to export, one run each')
+    parser.add_argument('--interfaces', type=int, default=2)
+    parser.add_argument('--properties', type=int, default=8)
+    parser.add_argument(
+        '--calls', type=int, default=2000,
+        help='Get, GetAll and Set calls to time per run')
+    parser.add_argument(
+        '--signals', type=int, default=10000,
+        help='PropertiesChanged signals to emit per run')
+    parser.add_argument(
+        '--repeat', type=int, default=3,
+        help='GetManagedObjects calls and introspection crawls per run')
+    parser.add_argument('--timeout', type=float, default=120)
+    parser.add_argument('--daemon', default='dbus-daemon')
+    parser.add_argument('--output', help='write the results to a file')
+    parser.add_argument('--serve', metavar='ADDRESS', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.serve:
+        serve(args.serve, args.objects[0], args.interfaces, args.properties)
+        return
+
+    results = benchmark(
+        args.objects, args.interfaces, args.properties, args.calls,
+        args.signals, args.repeat, args.timeout, args.daemon)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+    else:
+        json.dump(results, sys.stdout, indent=2, sort_keys=True)
+        sys.stdout.write('\n')
+
+
+if __name__ == '__main__':
+    main()
@@ -14,9 +14,23 @@
 # implied. See the License for the specific language governing
 # permissions and limitations under the License.
 
+import collections
+import contextlib
+import functools
+import threading
 import dbus
 import dbus.service
 import dbus.exceptions
+from _dbus_bindings import DBUS_INTROSPECT_1_0_XML_DOCTYPE_DECL_NODE
+from obmc.dbuslib import instrumentation
+from obmc.dbuslib import signalpolicy
+from obmc.dbuslib.enums import DBUS_OBJMGR_IFACE
+from obmc.dbuslib.enums import OBMC_INSTRUMENTATION_IFACE
+from obmc.dbuslib.enums import OBMC_PROPERTIES_IFACE
+from obmc.dbuslib.schema import Schema
+from obmc.dbuslib.signature import guess_signature
+from obmc.utils import tracing
+from obmc.utils.pathtree import PathTree
 
 OBJ_PREFIX = '/xyz/openbmc_project'
 
@@ -29,12 +43,269 @@ def get_dbus():
     return dbus.SystemBus()
 
 
-class DbusProperties(dbus.service.Object):
+class InstrumentedObject(dbus.service.Object):
+    ''' Records the call count and latency of every method call
+    dispatched to the object while obmc.dbuslib.instrumentation is
+    enabled, and traces each call as a span while obmc.utils.tracing is
+    enabled.  Calls on the Properties interfaces are keyed on the
+    interface named in their first argument rather than on the
+    Properties interface itself.
+    '''
+
+    _properties_ifaces = (dbus.PROPERTIES_IFACE, OBMC_PROPERTIES_IFACE)
+
+    def _message_cb(self, connection, message):
+        if not (instrumentation.enabled or tracing.enabled):
+            return super(InstrumentedObject, self)._message_cb(
+                connection, message)
+
+        interface_name = message.get_interface()
+        if interface_name in self._properties_ifaces:
+            args = message.get_args_list()
+            if args:
+                interface_name = args[0]
+        method_name = message.get_member()
+        with tracing.span(method_name, 'dbus', interface=interface_name,
+                          path=message.get_path()):
+            if not instrumentation.enabled:
+                return super(InstrumentedObject, self)._message_cb(
+                    connection, message)
+            with instrumentation.timed(interface_name, method_name):
+                return super(InstrumentedObject, self)._message_cb(
+                    connection, message)
+
+
+class InstrumentationObject(dbus.service.Object):
+    ''' Exposes the statistics collected by obmc.dbuslib.instrumentation
+    on a read-only interface.  Export one per process, at a path of the
+    daemon's choosing.
+    '''
+
+    @dbus.service.method(
+        OBMC_INSTRUMENTATION_IFACE, in_signature='', out_signature='b')
+    def IsEnabled(self):
+        return instrumentation.enabled
+
+    @dbus.service.method(
+        OBMC_INSTRUMENTATION_IFACE, in_signature='', out_signature='au')
+    def GetBuckets(self):
+        return instrumentation.BUCKETS
+
+    @dbus.service.method(
+        OBMC_INSTRUMENTATION_IFACE, in_signature='',
+        out_signature='a{s(tddat)}')
+    def GetMethodStatistics(self):
+        methods = instrumentation.dump()['methods']
+        return dict(
+            (k, (v['count'], v['total'], v['max'], v['buckets']))
+            for k, v in methods.items())
+
+    @dbus.service.method(
+        OBMC_INSTRUMENTATION_IFACE, in_signature='', out_signature='a{st}')
+    def GetSignalCounts(self):
+        return instrumentation.dump()['signals']
+
+
+class CachedIntrospection(dbus.service.Object):
+    ''' Replaces the dbus-python Introspect method, which walks the
+    class table on every call, with one that caches the generated XML.
+    Method and signal elements are cached per class and rebuilt when
+    the class table changes (e.g. add_interfaces_to_class).  Property
+    elements, which dbus-python does not generate at all, are derived
+    from self.properties and cached per object until the set of
+    interfaces or properties changes.
+    '''
+
+    _introspect_class_cache = {}
+
+    @classmethod
+    def _introspect_interfaces(cls):
+        table = cls._dbus_class_table[
+            '{}.{}'.format(cls.__module__, cls.__name__)]
+        fingerprint = tuple((k, len(v)) for k, v in table.items())
+        cached = cls._introspect_class_cache.get(cls)
+        if cached is not None and cached[0] == fingerprint:
+            return cached
+
+        fragments = {}
+        for iface, funcs in table.items():
+            xml = []
+            for func in funcs.values():
+                if getattr(func, '_dbus_is_method', False):
+                    xml.append(cls._reflect_on_method(func))
+                elif getattr(func, '_dbus_is_signal', False):
+                    xml.append(cls._reflect_on_signal(func))
+            fragments[iface] = ''.join(xml)
+
+        cached = (fingerprint, fragments)
+        cls._introspect_class_cache[cls] = cached
+        return cached
+
+    def _property_access(self, interface_name, property_name):
+        return 'readwrite'
+
+    def _introspect_body(self):
+        class_fingerprint, fragments = self._introspect_interfaces()
+        properties = getattr(self, 'properties', {})
+        key = (class_fingerprint,
+               tuple((k, len(v)) for k, v in properties.items()))
+        cached = getattr(self, '_introspect_cache', None)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+
+        xml = []
+        for iface in sorted(set(fragments.keys()) | set(properties.keys())):
+            xml.append('  <interface name="%s">\n' % iface)
+            xml.append(fragments.get(iface, ''))
+            for name, value in properties.get(iface, {}).items():
+                xml.append(
+                    '    <property name="%s" type="%s" access="%s"/>\n' % (
+                        name, guess_signature(value),
+                        self._property_access(iface, name)))
+            xml.append('  </interface>\n')
+
+        body = ''.join(xml)
+        self._introspect_cache = (key, body)
+        return body
+
+    @dbus.service.method(
+        dbus.INTROSPECTABLE_IFACE, in_signature='', out_signature='s',
+        path_keyword='object_path', connection_keyword='connection')
+    def Introspect(self, object_path, connection):
+        xml = [DBUS_INTROSPECT_1_0_XML_DOCTYPE_DECL_NODE,
+               '<node name="%s">\n' % object_path,
+               self._introspect_body()]
+        for name in connection.list_exported_child_objects(object_path):
+            xml.append('  <node name="%s"/>\n' % name)
+        xml.append('</node>\n')
+        return ''.join(xml)
+
+
+class PropertyProvider(object):
+    ''' A callable computing a property value on demand, with the
+    result cached for ttl seconds.  For a further stale_ttl seconds the
+    cached value is still returned, and a refresh is scheduled from the
+    main loop (stale-while-revalidate).  Concurrent readers of an
+    expired value share a single call to the provider.
+    '''
+
+    def __init__(self, func, ttl=0, stale_ttl=0):
+        self.func = func
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.value = None
+        self.timestamp = None
+        self.revalidating = False
+        self.lock = threading.Lock()
+
+    def refresh(self):
+        with self.lock:
+            try:
+                self.value = self.func()
+                self.timestamp = signalpolicy.monotonic()
+            finally:
+                # Let a later stale read schedule another attempt if
+                # the provider raised.
+                self.revalidating = False
+        return self.value
+
+    def read(self, revalidate=None):
+        ''' Returns a (value, fresh) tuple, where fresh is True if the
+        provider was invoked to compute value.
+
+        Arguments:
+        revalidate -- Called with no arguments when a stale value is
+            returned and a refresh should be scheduled.
+        '''
+        timestamp = self.timestamp
+        if timestamp is not None:
+            age = signalpolicy.monotonic() - timestamp
+            if age < self.ttl:
+                return self.value, False
+            if age < self.ttl + self.stale_ttl and revalidate:
+                if not self.revalidating:
+                    self.revalidating = True
+                    revalidate()
+                return self.value, False
+
+        with self.lock:
+            if self.timestamp is not timestamp:
+                # Another reader refreshed the value while we waited.
+                return self.value, False
+            self.value = self.func()
+            self.timestamp = signalpolicy.monotonic()
+            self.revalidating = False
+        return self.value, True
+
+
+class DbusProperties(CachedIntrospection, InstrumentedObject):
+    # A schema.Schema (or the dict to compile one from) validating Set
+    # and SetMultiple.  May be set on the class so that every instance
+    # shares one compiled schema.
+    schema = None
+
     def __init__(self, **kw):
         self.validator = kw.pop('validator', None)
+        schema = kw.pop('schema', None)
+        if schema is not None:
+            if not isinstance(schema, Schema):
+                schema = Schema(schema)
+            self.schema = schema
+        elif self.schema is not None and \
+                not isinstance(self.schema, Schema):
+            self.schema = self._class_schema()
+        # Milliseconds to accumulate PropertiesChanged signals for
+        # before flushing them, one signal per interface.  None (the
+        # default) emits a signal for every change outside of batch().
+        self.coalesce_window = kw.pop('coalesce_window', None)
         super(DbusProperties, self).__init__(**kw)
         self.properties = {}
         self._export = False
+        self._pending_signals = {}
+        self._batch_depth = 0
+        self._flush_source = None
+        self._signal_policies = {}
+        self._signal_state = {}
+        self._deferred_signals = {}
+        self._deferred_sources = {}
+        self.signal_counters = {'emitted': 0, 'suppressed': 0}
+        self._providers = {}
+        self._change_listeners = []
+
+    @classmethod
+    def _class_schema(cls):
+        # Compile a dict schema declared on the class once per class,
+        # recompiling only if the class attribute is replaced.
+        compiled = cls.__dict__.get('_compiled_schema')
+        if compiled is None or compiled[0] is not cls.schema:
+            compiled = (cls.schema, Schema(cls.schema))
+            cls._compiled_schema = compiled
+        return compiled[1]
+
+    @classmethod
+    def create_many(cls, items, **kw):
+        """
+        Construct one object per (object_path, properties) tuple in
+        items, with properties installed directly rather than through
+        Set, so no validation, change tracking or signals are incurred
+        while populating.  Each object is still constructed (and, given
+        a connection, exported) individually; only the per-property Set
+        calls are saved.  The property dicts are copied, so items may
+        share them.  Returns a list of the new objects.
+
+        Arguments:
+        items -- An iterable of (object_path, properties) tuples, where
+            properties maps interface names to property dicts.
+        kw -- Passed to the constructor of each object, e.g. conn.
+        """
+
+        objs = []
+        for object_path, properties in items:
+            obj = cls(object_path=object_path, **kw)
+            obj.properties = dict(
+                (k, dict(v)) for k, v in properties.items())
+            objs.append(obj)
+        return objs
 
     def unmask_signals(self):
         self._export = True
@@ -44,15 +315,232 @@ class DbusProperties(dbus.service.Object):
 
     def mask_signals(self):
         self._export = False
+        self._cancel_flush()
+        self._pending_signals = {}
+        for key in list(self._deferred_sources.keys()):
+            self._cancel_deferred(key)
         inst = super(DbusProperties, self)
         if hasattr(inst, 'mask_signals'):
             inst.mask_signals()
 
+    @contextlib.contextmanager
+    def batch(self):
+        ''' Accumulate PropertiesChanged signals for the duration of
+        the block and emit one signal per interface when it exits.
+        '''
+        self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            self._batch_depth -= 1
+            if not self._batch_depth:
+                self.flush_signals()
+
+    def flush_signals(self):
+        self._cancel_flush()
+        pending = self._pending_signals
+        self._pending_signals = {}
+        if not self._export:
+            return
+        for interface_name, changed in pending.items():
+            self._emit_properties_changed(interface_name, changed)
+
+    def _emit_properties_changed(self, interface_name, changed):
+        if instrumentation.enabled:
+            instrumentation.record_signal(
+                interface_name, 'PropertiesChanged')
+        self.PropertiesChanged(interface_name, changed, [])
+
+    def _cancel_flush(self):
+        if self._flush_source is not None:
+            from gi.repository import GLib
+            GLib.source_remove(self._flush_source)
+            self._flush_source = None
+
+    def _flush_timeout(self):
+        self._flush_source = None
+        self.flush_signals()
+        return False
+
+    def set_signal_policy(self, interface_name, policy, property_name=None):
+        ''' Apply a signalpolicy.SignalPolicy to PropertiesChanged
+        emission for a property, or for every property of an interface
+        without a property specific policy if property_name is None.
+        A policy of None removes the policy.
+        '''
+        key = (interface_name, property_name)
+        if policy is None:
+            self._signal_policies.pop(key, None)
+        else:
+            self._signal_policies[key] = policy
+
+    def _get_signal_policy(self, interface_name, property_name):
+        policy = self._signal_policies.get((interface_name, property_name))
+        if policy is None:
+            policy = self._signal_policies.get((interface_name, None))
+        return policy
+
+    def _cancel_deferred(self, key):
+        self._deferred_signals.pop(key, None)
+        source = self._deferred_sources.pop(key, None)
+        if source is not None:
+            from gi.repository import GLib
+            GLib.source_remove(source)
+
+    def _flush_deferred(self, key):
+        self._deferred_sources.pop(key, None)
+        if key not in self._deferred_signals:
+            return False
+        value = self._deferred_signals.pop(key)
+        self._signal_state[key] = (value, signalpolicy.monotonic())
+        self.signal_counters['emitted'] += 1
+        interface_name, property_name = key
+        self._emit_changed(interface_name, {property_name: value})
+        return False
+
+    def _apply_signal_policies(self, interface_name, changed):
+        now = signalpolicy.monotonic()
+        counters = self.signal_counters
+        emit = {}
+        for property_name, value in changed.items():
+            policy = self._get_signal_policy(interface_name, property_name)
+            if policy is None:
+                emit[property_name] = value
+                continue
+
+            key = (interface_name, property_name)
+            action, delay = policy.check(
+                self._signal_state.get(key), value, now)
+            if action == signalpolicy.EMIT:
+                self._cancel_deferred(key)
+                self._signal_state[key] = (value, now)
+                emit[property_name] = value
+            elif action == signalpolicy.DEFER:
+                if key in self._deferred_signals:
+                    counters['suppressed'] += 1
+                self._deferred_signals[key] = value
+                if key not in self._deferred_sources:
+                    from gi.repository import GLib
+                    self._deferred_sources[key] = GLib.timeout_add(
+                        int(delay * 1000) + 1, self._flush_deferred, key)
+            else:
+                if key in self._deferred_signals:
+                    counters['suppressed'] += 1
+                self._cancel_deferred(key)
+                counters['suppressed'] += 1
+
+        counters['emitted'] += len(emit)
+        return emit
+
+    def add_change_listener(self, callback):
+        ''' Register callback(interface_name, changed) to be invoked for
+        every property change, whether or not signals are masked.
+        '''
+        self._change_listeners.append(callback)
+
+    def remove_change_listener(self, callback):
+        if callback in self._change_listeners:
+            self._change_listeners.remove(callback)
+
+    def _properties_changed(self, interface_name, changed):
+        for callback in self._change_listeners:
+            callback(interface_name, changed)
+
+        if not self._export:
+            return
+
+        if self._signal_policies:
+            changed = self._apply_signal_policies(interface_name, changed)
+            if not changed:
+                return
+
+        self._emit_changed(interface_name, changed)
+
+    def _emit_changed(self, interface_name, changed):
+        if self._batch_depth or self.coalesce_window is not None:
+            self._pending_signals.setdefault(
+                interface_name, {}).update(changed)
+            if not self._batch_depth and self._flush_source is None:
+                from gi.repository import GLib
+                self._flush_source = GLib.timeout_add(
+                    self.coalesce_window, self._flush_timeout)
+            return
+
+        self._emit_properties_changed(interface_name, changed)
+
+    def add_property_provider(
+            self, interface_name, property_name, func, ttl=0, stale_ttl=0):
+        ''' Compute a property with func on Get and GetAll rather than
+        requiring its value to be pushed into self.properties.  See
+        PropertyProvider for the meaning of ttl and stale_ttl.
+        '''
+        self.properties.setdefault(interface_name, {})
+        self._providers.setdefault(interface_name, {})[property_name] = \
+            PropertyProvider(func, ttl, stale_ttl)
+
+    def remove_property_provider(self, interface_name, property_name):
+        providers = self._providers.get(interface_name, {})
+        providers.pop(property_name, None)
+        if not providers:
+            self._providers.pop(interface_name, None)
+
+    def _store_provided(self, interface_name, changed):
+        props = self.properties.setdefault(interface_name, {})
+        for property_name, value in list(changed.items()):
+            if property_name in props and props[property_name] == value:
+                del changed[property_name]
+            else:
+                props[property_name] = value
+        if changed:
+            self._properties_changed(interface_name, changed)
+
+    def _revalidate(self, interface_name, property_name):
+        provider = self._providers.get(interface_name, {}).get(property_name)
+        if provider is not None:
+            value = provider.refresh()
+            self._store_provided(interface_name, {property_name: value})
+        return False
+
+    def _read_providers(self, interface_name, property_names=None):
+        providers = self._providers.get(interface_name)
+        if not providers:
+            return
+
+        if property_names is None:
+            property_names = list(providers.keys())
+
+        changed = {}
+        for property_name in property_names:
+            provider = providers.get(property_name)
+            if provider is None:
+                continue
+
+            def revalidate(name=property_name):
+                from gi.repository import GLib
+                GLib.idle_add(self._revalidate, interface_name, name)
+
+            value, fresh = provider.read(revalidate)
+            if fresh:
+                changed[property_name] = value
+
+        if changed:
+            self._store_provided(interface_name, changed)
+
+    def _get_all(self, interface_name):
+        try:
+            d = self.properties[interface_name]
+            return d
+        except Exception:
+            raise dbus.exceptions.DBusException(
+                "Unknown interface: '{}'".format(interface_name),
+                name="org.freedesktop.DBus.Error.UnknownInterface")
+
     @dbus.service.method(
         dbus.PROPERTIES_IFACE,
         in_signature='ss', out_signature='v')
     def Get(self, interface_name, property_name):
-        d = self.GetAll(interface_name)
+        self._read_providers(interface_name, (property_name,))
+        d = self._get_all(interface_name)
         try:
             v = d[property_name]
             return v
@@ -65,58 +553,62 @@ class DbusProperties(dbus.service.Object):
         dbus.PROPERTIES_IFACE,
         in_signature='s', out_signature='a{sv}')
     def GetAll(self, interface_name):
-        try:
-            d = self.properties[interface_name]
-            return d
-        except Exception:
-            raise dbus.exceptions.DBusException(
-                "Unknown interface: '{}'".format(interface_name),
-                name="org.freedesktop.DBus.Error.UnknownInterface")
+        self._read_providers(interface_name)
+        return self._get_all(interface_name)
+
+    def _property_access(self, interface_name, property_name):
+        if self.schema is not None and \
+                self.schema.is_readonly(interface_name, property_name):
+            return 'read'
+        return 'readwrite'
 
     @dbus.service.method(
         dbus.PROPERTIES_IFACE,
-        in_signature='ssv')
-    def Set(self, interface_name, property_name, new_value):
+        in_signature='ssv', sender_keyword='sender')
+    def Set(self, interface_name, property_name, new_value, sender=None):
+        if self.schema is not None:
+            self.schema.validate(
+                interface_name, property_name, new_value,
+                remote=sender is not None)
+
         if (interface_name not in self.properties):
             self.properties[interface_name] = {}
 
         if self.validator:
             self.validator(interface_name, property_name, new_value)
 
-        try:
-            old_value = self.properties[interface_name][property_name]
-            if (old_value != new_value):
-                self.properties[interface_name][property_name] = new_value
-                if self._export:
-                    self.PropertiesChanged(
-                        interface_name, {property_name: new_value}, [])
+        props = self.properties[interface_name]
+        if property_name in props and props[property_name] == new_value:
+            return
 
-        except Exception:
-            self.properties[interface_name][property_name] = new_value
-            if self._export:
-                self.PropertiesChanged(
-                    interface_name, {property_name: new_value}, [])
+        props[property_name] = new_value
+        self._properties_changed(interface_name, {property_name: new_value})
 
     @dbus.service.method(
-        "org.openbmc.Object.Properties", in_signature='sa{sv}')
-    def SetMultiple(self, interface_name, prop_dict):
+        "org.openbmc.Object.Properties", in_signature='sa{sv}',
+        sender_keyword='sender')
+    def SetMultiple(self, interface_name, prop_dict, sender=None):
+        if self.schema is not None:
+            self.schema.validate_many(
+                interface_name, prop_dict, remote=sender is not None)
+
+        if self.validator:
+            for property_name, new_value in prop_dict.items():
+                self.validator(interface_name, property_name, new_value)
+
         if (interface_name not in self.properties):
             self.properties[interface_name] = {}
 
-        value_changed = False
-        for property_name in prop_dict:
-            new_value = prop_dict[property_name]
-            try:
-                old_value = self.properties[interface_name][property_name]
-                if (old_value != new_value):
-                    self.properties[interface_name][property_name] = new_value
-                    value_changed = True
+        props = self.properties[interface_name]
+        changed = {}
+        for property_name, new_value in prop_dict.items():
+            if property_name in props and props[property_name] == new_value:
+                continue
+            props[property_name] = new_value
+            changed[property_name] = new_value
 
-            except Exception:
-                self.properties[interface_name][property_name] = new_value
-                value_changed = True
-        if (value_changed is True and self._export):
-            self.PropertiesChanged(interface_name, prop_dict, [])
+        if changed:
+            self._properties_changed(interface_name, changed)
 
     @dbus.service.signal(
         dbus.PROPERTIES_IFACE, signature='sa{sv}as')
@@ -138,33 +630,42 @@ def add_interfaces_to_class(cls, ifaces):
     ifaces -- The property-only interfaces to add to the class.
     """
 
+    class_table_key = '{}.{}'.format(cls.__module__, cls.__name__)
+    class_table = cls._dbus_class_table[class_table_key]
     for iface in ifaces:
-        class_table_key = '{}.{}'.format(cls.__module__, cls.__name__)
-        cls._dbus_class_table[class_table_key].setdefault(iface, {})
+        class_table.setdefault(iface, {})
 
 
 def add_interfaces(ifaces):
     """
-    A class decorator for add_interfaces_to_class.
+    A class decorator for add_interfaces_to_class.  The interfaces
+    are added once, when the class is decorated.
     """
 
     def decorator(cls):
-        undecorated = cls.__init__
-
-        def ctor(obj, *a, **kw):
-            undecorated(obj, *a, **kw)
-            add_interfaces_to_class(cls, ifaces)
-
-        cls.__init__ = ctor
+        add_interfaces_to_class(cls, ifaces)
         return cls
     return decorator
 
 
-class DbusObjectManager(dbus.service.Object):
+class DbusObjectManager(CachedIntrospection, InstrumentedObject):
     def __init__(self, **kw):
+        # Keep a typed copy of the GetManagedObjects reply, rebuilding
+        # only the entries of objects that changed since the last call.
+        self.cache_reply = kw.pop('cache_reply', False)
+        # The number of InterfacesAdded/Removed signals add_many and
+        # remove_many emit per main loop iteration.  None emits them
+        # all immediately.
+        self.signal_batch_size = kw.pop('signal_batch_size', None)
         super(DbusObjectManager, self).__init__(**kw)
         self.objects = {}
+        self._object_tree = PathTree()
         self._export = False
+        self._signal_queue = collections.deque()
+        self._drain_source = None
+        self._listeners = {}
+        self._reply = dbus.Dictionary(signature='oa{sa{sv}}')
+        self._dirty = set()
 
     def unmask_signals(self):
         self._export = True
@@ -174,32 +675,187 @@ class DbusObjectManager(dbus.service.Object):
 
     def mask_signals(self):
         self._export = False
+        self._signal_queue.clear()
+        if self._drain_source is not None:
+            from gi.repository import GLib
+            GLib.source_remove(self._drain_source)
+            self._drain_source = None
         inst = super(DbusObjectManager, self)
         if hasattr(inst, 'mask_signals'):
             inst.mask_signals()
 
-    def add(self, object_path, obj):
+    def _track(self, object_path, obj):
+        self._object_tree[object_path] = obj
+        if not self.cache_reply:
+            return
+        self._dirty.add(object_path)
+        if hasattr(obj, 'add_change_listener'):
+            listener = functools.partial(self._object_changed, object_path)
+            obj.add_change_listener(listener)
+            self._listeners[object_path] = listener
+
+    def _untrack(self, object_path, obj):
+        tree = self._object_tree
+        if tree.get(object_path) is not None:
+            if tree.get_children(object_path):
+                tree.demote(object_path)
+            else:
+                del tree[object_path]
+        if not self.cache_reply:
+            return
+        self._dirty.add(object_path)
+        listener = self._listeners.pop(object_path, None)
+        if listener is not None:
+            obj.remove_change_listener(listener)
+
+    def _object_changed(self, object_path, interface_name, changed):
+        self._dirty.add(object_path)
+
+    def invalidate(self, object_path=None):
+        ''' Mark the cached GetManagedObjects reply for object_path (or
+        every object, if None) as stale.  Only needed when an object's
+        properties are modified (or self.properties is replaced) without
+        going through Set, SetMultiple or a property provider.
+        '''
+        if not self.cache_reply:
+            return
+        if object_path is None:
+            self._dirty.update(self.objects.keys())
+        else:
+            self._dirty.add(object_path)
+
+    def _drain_signals(self):
+        queue = self._signal_queue
+        for _ in range(self.signal_batch_size or len(queue)):
+            if not queue:
+                break
+            signal, args = queue.popleft()
+            if instrumentation.enabled:
+                instrumentation.record_signal(
+                    DBUS_OBJMGR_IFACE, signal.__name__)
+            signal(*args)
+
+        if queue:
+            return True
+
+        self._drain_source = None
+        return False
+
+    def _queue_signal(self, signal, *args):
+        self._signal_queue.append((signal, args))
+
+    def _flush_signal_queue(self):
+        if not self._signal_queue or self._drain_source is not None:
+            return
+
+        if self.signal_batch_size is None:
+            self._drain_signals()
+        else:
+            from gi.repository import GLib
+            self._drain_source = GLib.idle_add(self._drain_signals)
+
+    def _add(self, object_path, obj):
+        old = self.objects.get(object_path)
+        if old is not None:
+            self._untrack(object_path, old)
         self.objects[object_path] = obj
+        self._track(object_path, obj)
         if self._export:
-            self.InterfacesAdded(object_path, obj.properties)
+            self._queue_signal(
+                self.InterfacesAdded, object_path, obj.properties)
 
-    def remove(self, object_path):
+    def _remove(self, object_path):
         obj = self.objects.pop(object_path, None)
+        self._untrack(object_path, obj)
         obj.remove_from_connection()
         if self._export:
-            self.InterfacesRemoved(object_path, list(obj.properties.keys()))
+            self._queue_signal(
+                self.InterfacesRemoved,
+                object_path, list(obj.properties.keys()))
+
+    def add(self, object_path, obj):
+        self._add(object_path, obj)
+        if self._drain_source is None:
+            # Nothing is pending; emit the signal synchronously.
+            self._drain_signals()
+
+    def remove(self, object_path):
+        self._remove(object_path)
+        if self._drain_source is None:
+            self._drain_signals()
+
+    def add_many(self, objects):
+        ''' Add many objects at once, emitting InterfacesAdded in
+        batches of signal_batch_size.
+
+        Arguments:
+        objects -- An iterable of (object_path, obj) tuples, or a dict.
+        '''
+        if isinstance(objects, dict):
+            objects = objects.items()
+        for object_path, obj in objects:
+            self._add(object_path, obj)
+        self._flush_signal_queue()
+
+    def remove_many(self, object_paths):
+        for object_path in object_paths:
+            self._remove(object_path)
+        self._flush_signal_queue()
+
+    def remove_subtree(self, subtree):
+        ''' Remove every object at or below subtree. '''
+        self.remove_many(self.get_subtree_paths(subtree))
+
+    def get_subtree_paths(self, subtree):
+        paths = []
+        if subtree in self.objects:
+            paths.append(subtree)
+        try:
+            paths.extend(
+                k for k, v in self._object_tree.dataitems(subtree))
+        except KeyError:
+            pass
+        return paths
 
     def get(self, object_path, default=None):
         return self.objects.get(object_path, default)
 
+    def _refresh_reply(self):
+        reply = self._reply
+        for objpath in self._dirty:
+            obj = self.objects.get(objpath)
+            if obj is None:
+                reply.pop(objpath, None)
+                continue
+            reply[objpath] = dbus.Dictionary(
+                ((k, dbus.Dictionary(v, signature='sv'))
+                 for k, v in obj.properties.items()),
+                signature='sa{sv}')
+        self._dirty.clear()
+        return reply
+
+    def get_managed_objects(self, subtree='/'):
+        ''' The GetManagedObjects reply, restricted to objects at or
+        below subtree.
+        '''
+        if self.cache_reply:
+            data = self._refresh_reply()
+            if subtree == '/':
+                return data
+            return {k: data[k] for k in self.get_subtree_paths(subtree)}
+
+        # Read each object's properties now, as objects may replace
+        # their properties dict at any time.
+        objects = self.objects
+        paths = objects.keys() if subtree == '/' else \
+            self.get_subtree_paths(subtree)
+        return {k: objects[k].properties for k in paths}
+
     @dbus.service.method(
         "org.freedesktop.DBus.ObjectManager",
         in_signature='', out_signature='a{oa{sa{sv}}}')
     def GetManagedObjects(self):
-        data = {}
-        for objpath in list(self.objects.keys()):
-            data[objpath] = self.objects[objpath].properties
-        return data
+        return self.get_managed_objects()
 
     @dbus.service.signal(
         "org.freedesktop.DBus.ObjectManager", signature='oa{sa{sv}}')
@@ -0,0 +1,459 @@
+# Contributors Listed Below - COPYRIGHT 2016
+# [+] International Business Machines Corp.
+#
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied. See the License for the specific language governing
+# permissions and limitations under the License.
+
+import itertools
+import json
+import struct
+from obmc.dbuslib.convert import TEXT_TYPE, to_native
+# TODO: openbmc/openbmc#2994 remove python 2 support
+import sys
+if sys.version_info[0] < 3:
+    import cPickle as pickle
+else:
+    import pickle
+
+try:
+    import dbus
+except ImportError:
+    dbus = None
+
+BINARY_MAGIC = b'OBC'
+BINARY_VERSION = 2
+
+# Fixed size scalars, by D-Bus type code.
+SCALARS = {
+    'b': struct.Struct('<?'),
+    'y': struct.Struct('<B'),
+    'n': struct.Struct('<h'),
+    'q': struct.Struct('<H'),
+    'i': struct.Struct('<i'),
+    'u': struct.Struct('<I'),
+    'x': struct.Struct('<q'),
+    't': struct.Struct('<Q'),
+    'd': struct.Struct('<d'),
+}
+# The order of the scalar pools in encoded data.
+SCALAR_ORDER = 'bynqiuxtd'
+# Type codes for containers and raw bytes.  These are not D-Bus type
+# codes: 'a' here is a list of individually tagged elements, 'A' a list
+# of scalars or strings of a single type, 'e' a dict of tagged keys and
+# values, 'D' a dict with string keys, 'r' a struct and 'Y' a packed
+# byte array.
+STRINGS = 'sog'
+ARRAY = 'a'
+HOMOGENEOUS_ARRAY = 'A'
+DICT = 'e'
+STRING_DICT = 'D'
+STRUCT = 'r'
+BYTES = 'Y'
+
+_TAGS = dict((c, ord(c)) for c in list(SCALARS.keys()) + list(STRINGS) + [
+    ARRAY, HOMOGENEOUS_ARRAY, DICT, STRING_DICT, STRUCT, BYTES])
+_EMPTY = ()
+
+
+def _dbus_tags():
+    if dbus is None:
+        return []
+    # Ordered so subclasses are matched before their bases.
+    return [
+        (dbus.Boolean, 'b'), (dbus.Byte, 'y'), (dbus.Int16, 'n'),
+        (dbus.UInt16, 'q'), (dbus.Int32, 'i'), (dbus.UInt32, 'u'),
+        (dbus.Int64, 'x'), (dbus.UInt64, 't'), (dbus.Double, 'd'),
+        (dbus.ObjectPath, 'o'), (dbus.Signature, 'g'),
+    ]
+
+
+def _dbus_factories():
+    if dbus is None:
+        return {}
+    return {
+        'b': dbus.Boolean, 'y': dbus.Byte, 'n': dbus.Int16,
+        'q': dbus.UInt16, 'i': dbus.Int32, 'u': dbus.UInt32,
+        'x': dbus.Int64, 't': dbus.UInt64, 'd': dbus.Double,
+        's': dbus.String, 'o': dbus.ObjectPath, 'g': dbus.Signature,
+    }
+
+
+def _varint(n, out):
+    while n > 0x7f:
+        out.append((n & 0x7f) | 0x80)
+        n >>= 7
+    out.append(n)
+
+
+def _read_varint(buf, offset):
+    b = buf[offset]
+    if b < 0x80:
+        return b, offset + 1
+    n = 0
+    shift = 0
+    while True:
+        b = buf[offset]
+        offset += 1
+        n |= (b & 0x7f) << shift
+        if not b & 0x80:
+            return n, offset
+        shift += 7
+
+
+def _iter_next(iterator):
+    # TODO: openbmc/openbmc#2994 remove python 2 support
+    return getattr(iterator, '__next__', None) or iterator.next
+
+
+def _mapped(factory, iterable):
+    # A lazy map() on python 2 as well.
+    return (factory(x) for x in iterable)
+
+
+def _text(value):
+    if not isinstance(value, TEXT_TYPE):
+        value = value.decode('utf-8')
+    if u'\0' in value:
+        # D-Bus strings cannot contain NUL, which separates the strings
+        # of the string pool.
+        raise ValueError("Cannot encode a string containing NUL")
+    return value
+
+
+class _Encoder(object):
+    def __init__(self, codec):
+        self.tag = codec._tag
+        self.tags = bytearray()
+        self.counts = []
+        self.pools = dict((c, []) for c in SCALAR_ORDER)
+        self.strings = []
+        self.blobs = []
+
+    def add(self, value):
+        code = self.tag(value)
+        tags = self.tags
+        tags.append(_TAGS[code])
+        if code in SCALARS:
+            self.pools[code].append(value)
+        elif code in STRINGS:
+            self.strings.append(_text(value))
+        elif code == BYTES:
+            self.blobs.append(bytes(value))
+        elif code == DICT:
+            self.counts.append(len(value))
+            if all(self.tag(k) == 's' for k in value):
+                tags[-1] = _TAGS[STRING_DICT]
+                self.strings.extend(_text(k) for k in value)
+                for v in value.values():
+                    self.add(v)
+            else:
+                for k, v in value.items():
+                    self.add(k)
+                    self.add(v)
+        else:
+            self.counts.append(len(value))
+            if code == ARRAY and value:
+                codes = set(self.tag(v) for v in value)
+                element = codes.pop() if len(codes) == 1 else ARRAY
+                if element in SCALARS or element in STRINGS:
+                    tags[-1] = _TAGS[HOMOGENEOUS_ARRAY]
+                    tags.append(_TAGS[element])
+                    if element in SCALARS:
+                        self.pools[element].extend(value)
+                    else:
+                        self.strings.extend(_text(v) for v in value)
+                    return
+            for v in value:
+                self.add(v)
+
+    def serialize(self):
+        out = bytearray(BINARY_MAGIC)
+        out.append(BINARY_VERSION)
+        _varint(len(self.tags), out)
+        out.extend(self.tags)
+
+        sections = [self.pools[code] for code in SCALAR_ORDER]
+        sections += [self.counts, self.strings, self.blobs]
+        mask = 0
+        for i, values in enumerate(sections):
+            if values:
+                mask |= 1 << i
+        _varint(mask, out)
+
+        def section(fmt, values):
+            if values:
+                _varint(len(values), out)
+                out.extend(struct.pack(
+                    '<{}{}'.format(len(values), fmt), *values))
+
+        for code in SCALAR_ORDER:
+            section(SCALARS[code].format[-1:], self.pools[code])
+        section('I', self.counts)
+        if self.strings:
+            text = u'\0'.join(self.strings).encode('utf-8')
+            _varint(len(self.strings), out)
+            _varint(len(text), out)
+            out.extend(text)
+        if self.blobs:
+            section('I', [len(x) for x in self.blobs])
+            out.extend(b''.join(self.blobs))
+        return bytes(out)
+
+
+class BinaryCodec(object):
+    ''' A compact, versioned, type-tagged binary encoding.  Integer
+    widths and the string flavours of dbus-python values (dbus.UInt32,
+    dbus.ObjectPath, ...) are preserved, so decode(typed=True) can
+    rebuild the original dbus types.  Native ints are stored as 64 bit
+    integers.
+
+    The encoding is columnar so that it can be decoded in bulk: a
+    stream of one byte type codes describing the shape of the value,
+    the container lengths, one packed array per scalar type and a
+    single NUL separated UTF-8 string pool.  Lists of scalars or
+    strings of one type and dicts with string keys take their elements
+    straight from the pools.
+    '''
+
+    name = 'binary'
+
+    def __init__(self):
+        self.dbus_tags = _dbus_tags()
+        self.factories = _dbus_factories()
+        # Type tags of the native types, which need no further checks.
+        self.native_tags = {
+            bool: 'b', float: 'd', TEXT_TYPE: 's', dict: DICT,
+            tuple: STRUCT, list: ARRAY,
+        }
+        if sys.version_info[0] > 2:
+            self.native_tags[bytes] = BYTES
+
+    def matches(self, data):
+        return data[:len(BINARY_MAGIC)] == BINARY_MAGIC
+
+    def _tag(self, value):
+        code = self.native_tags.get(type(value))
+        if code is not None:
+            return code
+        for t, code in self.dbus_tags:
+            if isinstance(value, t):
+                return code
+        if isinstance(value, bool):
+            return 'b'
+        if isinstance(value, int) or type(value).__name__ == 'long':
+            if -2 ** 63 <= value < 2 ** 63:
+                return 'x'
+            if 0 <= value < 2 ** 64:
+                return 't'
+            raise ValueError("Integer out of range: {}".format(value))
+        if isinstance(value, float):
+            return 'd'
+        if isinstance(value, TEXT_TYPE):
+            return 's'
+        if isinstance(value, (bytes, bytearray)):
+            if sys.version_info[0] < 3 and isinstance(value, str):
+                return 's'
+            return BYTES
+        if isinstance(value, dict):
+            return DICT
+        if isinstance(value, tuple):
+            return STRUCT
+        if isinstance(value, list):
+            return ARRAY
+        raise TypeError("Cannot encode {}".format(type(value)))
+
+    def encode(self, value):
+        encoder = _Encoder(self)
+        encoder.add(value)
+        return encoder.serialize()
+
+    @staticmethod
+    def _unpack(buf, offset, fmt, size):
+        n, offset = _read_varint(buf, offset)
+        values = struct.unpack_from('<{}{}'.format(n, fmt), buf, offset)
+        return values, offset + n * size
+
+    def decode(self, data, typed=False):
+        ''' Decode data produced by encode().  With typed=True, and
+        dbus-python available, scalars and strings are returned as the
+        dbus types they were encoded from (native ints as dbus.Int64);
+        containers are always returned as native lists, tuples and
+        dicts.
+        '''
+
+        if not self.matches(data):
+            raise ValueError("Not binary codec data")
+        version = bytearray(data[len(BINARY_MAGIC):len(BINARY_MAGIC) + 1])
+        if not version or version[0] != BINARY_VERSION:
+            raise ValueError("Unsupported binary codec version")
+        typed = typed and bool(self.factories)
+        try:
+            return self._decode(bytearray(data), typed)
+        except (struct.error, IndexError, KeyError, StopIteration,
+                UnicodeDecodeError):
+            raise ValueError("Corrupt binary codec data")
+
+    def _decode(self, buf, typed):
+        unpack = self._unpack
+        offset = len(BINARY_MAGIC) + 1
+        n, offset = _read_varint(buf, offset)
+        tags = iter(buf[offset:offset + n])
+        offset += n
+        mask, offset = _read_varint(buf, offset)
+
+        # A callable per type code returning the next value of that type,
+        # and the iterators values of each type are drawn from for lists
+        # of a single type.
+        readers = {}
+        sources = {}
+        for i, code in enumerate(SCALAR_ORDER):
+            if mask & (1 << i):
+                scalar = SCALARS[code]
+                values, offset = unpack(
+                    buf, offset, scalar.format[-1:], scalar.size)
+                if typed:
+                    values = map(self.factories[code], values)
+                pool = iter(values)
+                readers[_TAGS[code]] = _iter_next(pool)
+                sources[_TAGS[code]] = pool
+
+        counts = _EMPTY
+        if mask & (1 << len(SCALAR_ORDER)):
+            counts, offset = unpack(buf, offset, 'I', 4)
+        next_count = _iter_next(iter(counts))
+
+        strings = iter(_EMPTY)
+        if mask & (2 << len(SCALAR_ORDER)):
+            n, offset = _read_varint(buf, offset)
+            size, offset = _read_varint(buf, offset)
+            text = buf[offset:offset + size].decode('utf-8').split(u'\0')
+            offset += size
+            if len(text) != n:
+                raise ValueError("Corrupt binary codec data")
+            strings = iter(text)
+            next_string = _iter_next(strings)
+            for code in STRINGS:
+                if typed:
+                    factory = self.factories[code]
+                    readers[_TAGS[code]] = \
+                        lambda f=factory: f(next_string())
+                    sources[_TAGS[code]] = _mapped(factory, strings)
+                else:
+                    readers[_TAGS[code]] = next_string
+                    sources[_TAGS[code]] = strings
+
+        if mask & (4 << len(SCALAR_ORDER)):
+            lengths, offset = unpack(buf, offset, 'I', 4)
+            blobs = []
+            for length in lengths:
+                blobs.append(bytes(buf[offset:offset + length]))
+                offset += length
+            readers[_TAGS[BYTES]] = _iter_next(iter(blobs))
+
+        if offset != len(buf):
+            raise ValueError("Corrupt binary codec data")
+
+        next_tag = _iter_next(tags)
+
+        def read():
+            return readers[next_tag()]()
+
+        def read_array():
+            return [read() for _ in range(next_count())]
+
+        def read_homogeneous_array():
+            source = sources[next_tag()]
+            return list(itertools.islice(source, next_count()))
+
+        def read_struct():
+            return tuple([read() for _ in range(next_count())])
+
+        def read_dict():
+            value = {}
+            for _ in range(next_count()):
+                k = read()
+                value[k] = read()
+            return value
+
+        def read_string_dict():
+            n = next_count()
+            keys = list(itertools.islice(strings, n))
+            return dict(zip(keys, [read() for _ in range(n)]))
+
+        readers[_TAGS[ARRAY]] = read_array
+        readers[_TAGS[HOMOGENEOUS_ARRAY]] = read_homogeneous_array
+        readers[_TAGS[STRUCT]] = read_struct
+        readers[_TAGS[DICT]] = read_dict
+        readers[_TAGS[STRING_DICT]] = read_string_dict
+
+        return read()
+
+
+class JsonCodec(object):
+    ''' JSON, for human-readable caches.  Tuples are stored as lists and
+    dict keys as strings; byte arrays cannot be stored.
+    '''
+
+    name = 'json'
+
+    def matches(self, data):
+        return data[:1] == b'{'
+
+    def encode(self, value):
+        return json.dumps(to_native(value)).encode('utf-8')
+
+    def decode(self, data, typed=False):
+        return json.loads(data.decode('utf-8'))
+
+
+class PickleCodec(object):
+    ''' The original cache format.  Unpickling can execute arbitrary
+    code and pickles are not portable across Python versions; kept so
+    existing caches remain readable.
+    '''
+
+    name = 'pickle'
+
+    def matches(self, data):
+        return True
+
+    def encode(self, value):
+        return pickle.dumps(to_native(value))
+
+    def decode(self, data, typed=False):
+        return pickle.loads(data)
+
+
+CODECS = dict((x.name, x) for x in (BinaryCodec(), JsonCodec(), PickleCodec()))
+
+
+def get_codec(name):
+    try:
+        return CODECS[name]
+    except KeyError:
+        raise ValueError("Unknown codec: '{}'".format(name))
+
+
+def decode(data, typed=False, allow_pickle=True):
+    ''' Decode data written by any codec, detected from its first bytes.
+    Data not recognised as binary or JSON is assumed to be a pickle,
+    which is refused unless allow_pickle is set.
+    '''
+
+    for name in ('binary', 'json'):
+        c = CODECS[name]
+        if c.matches(data):
+            return c.decode(data, typed)
+    if not allow_pickle:
+        raise ValueError("Refusing to unpickle untrusted data")
+    return CODECS['pickle'].decode(data, typed)
@@ -0,0 +1,124 @@
+# Contributors Listed Below - COPYRIGHT 2016
+# [+] International Business Machines Corp.
+#
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied. See the License for the specific language governing
+# permissions and limitations under the License.
+
+try:
+    import dbus
+except ImportError:
+    dbus = None
+
+# TODO: openbmc/openbmc#2994 remove python 2 support
+TEXT_TYPE = type(u'')
+NATIVE_SCALARS = frozenset([bool, int, float, TEXT_TYPE, type(None)])
+
+
+def to_native(value):
+    ''' Convert a value built from dbus-python types (dbus.Int32,
+    dbus.Dictionary, dbus.ByteArray, ...) to the equivalent plain
+    Python value.  dbus types subclass the native types, so this works
+    whether or not dbus-python is importable; it is only needed to map
+    dbus.Boolean, which subclasses int, back to bool.
+    '''
+
+    t = type(value)
+    if t in NATIVE_SCALARS:
+        return value
+    if dbus is not None and isinstance(value, dbus.Boolean):
+        return bool(value)
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, int):
+        return int(value)
+    if isinstance(value, float):
+        return float(value)
+    if isinstance(value, TEXT_TYPE):
+        return TEXT_TYPE(value)
+    if isinstance(value, (bytes, bytearray)):
+        return bytes(value)
+    if isinstance(value, dict):
+        return dict((to_native(k), to_native(v)) for k, v in value.items())
+    if isinstance(value, tuple):
+        return tuple(to_native(x) for x in value)
+    if isinstance(value, list):
+        return [to_native(x) for x in value]
+
+    # TODO: openbmc/openbmc#2994 remove python 2 support
+    try:  # python 2
+        if isinstance(value, long):
+            return long(value)
+    except NameError:  # python 3
+        pass
+
+    raise TypeError("Cannot convert {} to a native type".format(t))
+
+
+def _compile(sig):
+    # Imported here so modules only needing to_native do not depend on
+    # dbus-python.
+    from obmc.dbuslib.signature import split_signature
+
+    scalars = {
+        'y': dbus.Byte,
+        'b': dbus.Boolean,
+        'n': dbus.Int16,
+        'q': dbus.UInt16,
+        'i': dbus.Int32,
+        'u': dbus.UInt32,
+        'x': dbus.Int64,
+        't': dbus.UInt64,
+        'd': dbus.Double,
+        's': dbus.String,
+        'o': dbus.ObjectPath,
+        'g': dbus.Signature,
+        'h': dbus.UInt32,
+    }
+
+    c = sig[0]
+    if c in scalars:
+        return scalars[c]
+    if c == 'v':
+        return lambda v: v
+    if sig.startswith('a{'):
+        inner = sig[2:-1]
+        key, value = [_compile(x) for x in split_signature(inner)]
+        return lambda v: dbus.Dictionary(
+            ((key(k), value(x)) for k, x in v.items()), signature=inner)
+    if c == 'a':
+        inner = sig[1:]
+        element = _compile(inner)
+        return lambda v: dbus.Array(
+            (element(x) for x in v), signature=inner)
+    if c == '(':
+        inner = sig[1:-1]
+        fields = [_compile(x) for x in split_signature(inner)]
+        return lambda v: dbus.Struct(
+            (f(x) for f, x in zip(fields, v)), signature=inner)
+
+    raise ValueError("Invalid signature: '{}'".format(sig))
+
+
+_converters = {}
+
+
+def from_native(value, sig):
+    ''' Convert a plain Python value to dbus-python types according to
+    the D-Bus signature of a single complete type.  Variants ('v') are
+    left for dbus-python to guess.
+    '''
+
+    converter = _converters.get(sig)
+    if converter is None:
+        converter = _converters[sig] = _compile(sig)
+    return converter(value)
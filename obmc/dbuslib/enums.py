@@ -24,8 +24,10 @@ DBUS_UNKNOWN_METHOD = 'org.freedesktop.DBus.Error.UnknownMethod'
 DBUS_INVALID_ARGS = 'org.freedesktop.DBus.Error.InvalidArgs'
 DBUS_NO_REPLY = 'org.freedesktop.DBus.Error.NoReply'
 DBUS_TYPE_ERROR = 'org.freedesktop.DBus.Python.TypeError'
+DBUS_PROPERTY_READ_ONLY = 'org.freedesktop.DBus.Error.PropertyReadOnly'
 OBMC_ASSOCIATIONS_IFACE = 'org.openbmc.Associations'
 OBMC_ASSOC_IFACE = 'org.openbmc.Association'
 OBMC_DELETE_IFACE = 'org.openbmc.Object.Delete'
 OBMC_PROPERTIES_IFACE = "org.openbmc.Object.Properties"
 OBMC_ENUMERATE_IFACE = "org.openbmc.Object.Enumerate"
+OBMC_INSTRUMENTATION_IFACE = 'org.openbmc.Instrumentation'
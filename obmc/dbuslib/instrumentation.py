@@ -0,0 +1,117 @@
+# Contributors Listed Below - COPYRIGHT 2016
+# [+] International Business Machines Corp.
+#
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied. See the License for the specific language governing
+# permissions and limitations under the License.
+
+import bisect
+import threading
+from obmc.dbuslib.signalpolicy import monotonic
+
+# Upper bounds, in microseconds, of the latency histogram buckets.  The
+# final bucket counts everything slower than the last bound.
+BUCKETS = [10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 25000,
+           50000, 100000, 250000, 1000000]
+
+# Checked by the bindings before doing any work, so instrumentation
+# costs a single global lookup when disabled.
+enabled = False
+
+_lock = threading.Lock()
+_methods = {}
+_signals = {}
+
+
+class Histogram(object):
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = [0] * (len(BUCKETS) + 1)
+
+    def add(self, seconds):
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+        self.buckets[bisect.bisect_left(BUCKETS, seconds * 1e6)] += 1
+
+    def dumpd(self):
+        return {
+            'count': self.count,
+            'total': self.total,
+            'max': self.max,
+            'buckets': list(self.buckets),
+        }
+
+
+def enable():
+    global enabled
+    enabled = True
+
+
+def disable():
+    global enabled
+    enabled = False
+
+
+def reset():
+    with _lock:
+        _methods.clear()
+        _signals.clear()
+
+
+def record_call(interface_name, method_name, seconds):
+    key = (interface_name, method_name)
+    with _lock:
+        h = _methods.get(key)
+        if h is None:
+            h = _methods[key] = Histogram()
+        h.add(seconds)
+
+
+def record_signal(interface_name, signal_name, count=1):
+    key = (interface_name, signal_name)
+    with _lock:
+        _signals[key] = _signals.get(key, 0) + count
+
+
+class timed(object):
+    ''' A context manager recording the duration of its block as a call
+    of method_name on interface_name.
+    '''
+
+    def __init__(self, interface_name, method_name):
+        self.key = (interface_name, method_name)
+
+    def __enter__(self):
+        self.start = monotonic()
+        return self
+
+    def __exit__(self, *exc):
+        record_call(self.key[0], self.key[1], monotonic() - self.start)
+        return False
+
+
+def dump():
+    ''' Returns a snapshot of the collected statistics:
+    {'methods': {'iface.method': histogram}, 'signals': {'iface.signal': n},
+     'buckets': BUCKETS}, where each histogram is a dict of count, total
+    and max (seconds) and per-bucket counts.
+    '''
+
+    with _lock:
+        methods = dict(('{}.{}'.format(*k), v.dumpd())
+                       for k, v in _methods.items())
+        signals = dict(('{}.{}'.format(*k), v) for k, v in _signals.items())
+    return {'methods': methods, 'signals': signals, 'buckets': list(BUCKETS)}
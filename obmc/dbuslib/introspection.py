@@ -16,6 +16,7 @@
 
 import xml.etree.ElementTree as ET
 import dbus
+from obmc.utils import tracing
 
 
 class IntrospectionNodeParser:
@@ -91,9 +92,12 @@ class IntrospectionParser:
 
     def _introspect(self, path):
         try:
-            obj = self.bus.get_object(self.name, path, introspect=False)
-            iface = dbus.Interface(obj, dbus.INTROSPECTABLE_IFACE)
-            data = iface.Introspect()
+            with tracing.span(
+                    'Introspect', 'introspection', bus_name=self.name,
+                    path=path):
+                obj = self.bus.get_object(self.name, path, introspect=False)
+                iface = dbus.Interface(obj, dbus.INTROSPECTABLE_IFACE)
+                data = iface.Introspect()
         except dbus.DBusException:
             return None
 
@@ -111,6 +115,7 @@ class IntrospectionParser:
 
         return items
 
+    @tracing.traced('IntrospectionParser.introspect', 'introspection')
     def introspect(self, path='/', parser=None):
         items = {}
         if not parser:
@@ -0,0 +1,207 @@
+# Contributors Listed Below - COPYRIGHT 2016
+# [+] International Business Machines Corp.
+#
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied. See the License for the specific language governing
+# permissions and limitations under the License.
+
+import fcntl
+import os
+import struct
+import tempfile
+import threading
+
+MAGIC = b'OBMCLOG1'
+# key length, value length
+RECORD = struct.Struct('<HI')
+TOMBSTONE = 0xffffffff
+
+
+class LogStore(object):
+    ''' A key/value store kept in a single append-only log file.
+
+    Each write appends a record; the latest record for a key wins.  The
+    whole log is read with a single read when the store is opened, and
+    an in-memory index serves lookups from then on.  When superseded
+    records make up more than half of the log (and at least
+    compact_threshold bytes), the log is rewritten with only the live
+    records.
+
+    A log has a single writer: the store holds an exclusive lock on
+    path + '.lock' until close(), and opening a store already open in
+    another process (or elsewhere in this one) raises OSError.  Give
+    each daemon its own log.
+    '''
+
+    def __init__(self, path, compact_threshold=64 * 1024):
+        self.path = path
+        self.compact_threshold = compact_threshold
+        self.index = {}
+        self.size = 0
+        self.live = 0
+        self.lock = threading.Lock()
+        self._fd = None
+        self._lock_fd = None
+        self._lock()
+        self._load()
+
+    def _lock(self):
+        parent = os.path.dirname(self.path)
+        if parent and not os.path.exists(parent):
+            os.makedirs(parent)
+        fd = os.open(self.path + '.lock', os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except (IOError, OSError):
+            os.close(fd)
+            raise OSError('{} is in use by another process'.format(self.path))
+        self._lock_fd = fd
+
+    def _load(self):
+        try:
+            with open(self.path, 'rb') as f:
+                buf = f.read()
+        except (IOError, OSError):
+            buf = b''
+
+        if not buf.startswith(MAGIC):
+            self.size = 0
+            return
+
+        index = {}
+        live = 0
+        offset = len(MAGIC)
+        end = len(buf)
+        while offset + RECORD.size <= end:
+            klen, vlen = RECORD.unpack_from(buf, offset)
+            start = offset + RECORD.size
+            dlen = 0 if vlen == TOMBSTONE else vlen
+            if start + klen + dlen > end:
+                # A record truncated by a crash; ignore it, it will be
+                # overwritten by the next append.
+                break
+            key = buf[start:start + klen].decode('utf-8')
+            old = index.pop(key, None)
+            if old is not None:
+                live -= RECORD.size + len(key.encode('utf-8')) + len(old)
+            if vlen != TOMBSTONE:
+                index[key] = buf[start + klen:start + klen + dlen]
+                live += RECORD.size + klen + dlen
+            offset = start + klen + dlen
+
+        self.index = index
+        self.live = live
+        self.size = offset
+
+    def _open(self):
+        if self._fd is not None:
+            return
+        if self._lock_fd is None:
+            self._lock()
+        self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        if self.size == 0:
+            os.ftruncate(self._fd, 0)
+            os.write(self._fd, MAGIC)
+            self.size = len(MAGIC)
+        else:
+            os.ftruncate(self._fd, self.size)
+        os.lseek(self._fd, self.size, os.SEEK_SET)
+
+    @staticmethod
+    def _record(key, value):
+        k = key.encode('utf-8')
+        if value is None:
+            return RECORD.pack(len(k), TOMBSTONE) + k
+        return RECORD.pack(len(k), len(value)) + k + value
+
+    def read(self, key):
+        return self.index.get(key)
+
+    def keys(self):
+        return list(self.index.keys())
+
+    def __contains__(self, key):
+        return key in self.index
+
+    def write(self, key, value):
+        ''' Store value (bytes) for key, or delete key if value is None.
+        Writing the value already stored is a no-op.
+        '''
+
+        with self.lock:
+            old = self.index.get(key)
+            if old == value:
+                return
+
+            record = self._record(key, value)
+            self._open()
+            os.write(self._fd, record)
+            self.size += len(record)
+
+            klen = len(key.encode('utf-8'))
+            if old is not None:
+                self.live -= RECORD.size + klen + len(old)
+            if value is None:
+                self.index.pop(key, None)
+            else:
+                self.index[key] = value
+                self.live += len(record)
+
+            garbage = self.size - len(MAGIC) - self.live
+            if garbage > self.compact_threshold and garbage > self.live:
+                self._compact()
+
+    def delete(self, key):
+        if key in self.index:
+            self.write(key, None)
+
+    def _compact(self):
+        parent = os.path.dirname(self.path) or '.'
+        fd, tmp = tempfile.mkstemp(dir=parent, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(MAGIC)
+                for key, value in self.index.items():
+                    f.write(self._record(key, value))
+                f.flush()
+                os.fsync(f.fileno())
+            os.chmod(tmp, 0o644)
+            os.rename(tmp, self.path)
+        except Exception:
+            os.unlink(tmp)
+            raise
+
+        self._close()
+        self.size = len(MAGIC) + self.live
+
+    def compact(self):
+        with self.lock:
+            self._compact()
+
+    def sync(self):
+        with self.lock:
+            if self._fd is not None:
+                os.fsync(self._fd)
+
+    def _close(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+    def close(self):
+        ''' Close the log and release its lock. '''
+
+        with self.lock:
+            self._close()
+            if self._lock_fd is not None:
+                os.close(self._lock_fd)
+                self._lock_fd = None
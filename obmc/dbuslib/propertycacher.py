@@ -14,17 +14,39 @@
 # implied. See the License for the specific language governing
 # permissions and limitations under the License.
 
-import json
+import atexit
+import hashlib
 import os
-# TODO: openbmc/openbmc#2994 remove python 2 support
-import sys
-if sys.version_info[0] < 3:
-    import cPickle as pickle
-else:
-    import pickle
+import tempfile
+import threading
+from multiprocessing.pool import ThreadPool
+from obmc.dbuslib import codec
+from obmc.dbuslib.convert import from_native
+from obmc.dbuslib.logstore import LogStore
+from obmc.utils import tracing
 
 CACHE_PATH = '/var/cache/obmc/'
 
+# The codec used to write cache entries; see set_codec().  Entries are
+# read with whichever codec wrote them.
+_codec = codec.get_codec('pickle')
+# Whether entries written with the legacy pickle codec may be read.
+allow_pickle = True
+
+# The content hash of the last data written to each cache file, used to
+# skip rewriting unchanged data.
+_hashes = {}
+_write_lock = threading.Lock()
+_write_behind = None
+# A LogStore holding every cached interface, or None to store one file
+# per object and interface under CACHE_PATH.
+_store = None
+# Deserialized cache data by filename, and the cache file name prefixes
+# that preload() has scanned.  load() serves any filename under one of
+# the prefixes from memory, without touching the filesystem.
+_preloaded = {}
+_preload_prefixes = []
+
 
 def getCacheFilename(obj_path, iface_name):
     name = obj_path.replace('/', '.')
@@ -32,39 +54,305 @@ def getCacheFilename(obj_path, iface_name):
     return filename
 
 
+def set_codec(name):
+    ''' Select the codec for new cache entries: 'pickle' (the default,
+    readable by older releases), 'json' or 'binary'.
+    '''
+
+    global _codec
+    _codec = codec.get_codec(name)
+
+
+def _serialize(properties, iface_name):
+    return _codec.encode(properties[iface_name])
+
+
+def _deserialize(data):
+    return codec.decode(data, allow_pickle=allow_pickle)
+
+
+@tracing.traced(category='propertycacher')
+def _write(filename, data):
+    digest = hashlib.sha1(data).digest()
+    with _write_lock:
+        if _hashes.get(filename) == digest:
+            return
+
+        parent = os.path.dirname(filename)
+        try:
+            if not os.path.exists(parent):
+                os.makedirs(parent)
+            fd, tmp = tempfile.mkstemp(dir=parent, suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'wb') as output:
+                    output.write(data)
+                    output.flush()
+                    os.fsync(output.fileno())
+                os.chmod(tmp, 0o644)
+                os.rename(tmp, filename)
+            except Exception:
+                os.unlink(tmp)
+                raise
+            _hashes[filename] = digest
+        except Exception:
+            print("ERROR opening cache file: " + filename)
+
+
+def _preload_scope(filename):
+    name = os.path.basename(filename)
+    return any(name.startswith(x) for x in _preload_prefixes)
+
+
+def _write_data(filename, data):
+    if _preload_prefixes and _preload_scope(filename):
+        _preloaded[filename] = _deserialize(data)
+    if _store is not None:
+        _store.write(os.path.basename(filename), data)
+    else:
+        _write(filename, data)
+
+
+@tracing.traced(category='propertycacher')
+def _read_data(filename):
+    if _store is not None:
+        return _store.read(os.path.basename(filename))
+    if not os.path.isfile(filename):
+        return None
+    with open(filename, 'rb') as f:
+        return f.read()
+
+
+def _preload_one(filename):
+    try:
+        raw = _read_data(filename)
+        if raw is None:
+            return None
+        return filename, _deserialize(raw)
+    except Exception as e:
+        print("ERROR: Loading cache file: " + str(e))
+        return None
+
+
+@tracing.traced(category='propertycacher')
+def preload(prefix='/', workers=4):
+    ''' Read and deserialize every cached interface of the objects at or
+    below the object path prefix, using a pool of workers threads.
+    Subsequent load() calls under prefix are served from memory, with
+    a single directory scan standing in for a filesystem probe per
+    object.  Returns the number of cache entries loaded.
+    '''
+
+    name_prefix = prefix.replace('/', '.')[1:]
+    # Write pending saves first, so the scan below sees them.
+    if _write_behind is not None:
+        _write_behind.flush()
+    if _store is not None:
+        names = _store.keys()
+    else:
+        try:
+            names = os.listdir(CACHE_PATH)
+        except OSError:
+            names = []
+
+    filenames = [CACHE_PATH + x for x in names
+                 if x.startswith(name_prefix) and x.endswith('.props')]
+
+    pool = ThreadPool(workers)
+    try:
+        results = pool.map(_preload_one, filenames)
+    finally:
+        pool.close()
+        pool.join()
+
+    results = [x for x in results if x is not None]
+    for filename, data in results:
+        _preloaded[filename] = data
+    _preload_prefixes.append(name_prefix)
+
+    return len(results)
+
+
+def clear_preload():
+    ''' Release the data read by preload(). '''
+
+    _preloaded.clear()
+    del _preload_prefixes[:]
+
+
+def migrate_files(store, prefix, path=None, remove=True):
+    ''' Import the per-file cache entries of the objects at or below
+    the object path prefix, from path (CACHE_PATH by default), into
+    store.  Entries already in store are kept, as they are newer than
+    any file.
+    '''
+
+    name_prefix = prefix.replace('/', '.')[1:]
+    path = path or CACHE_PATH
+    try:
+        names = os.listdir(path)
+    except OSError:
+        return
+
+    for name in names:
+        if not name.startswith(name_prefix) or not name.endswith('.props'):
+            continue
+        filename = os.path.join(path, name)
+        try:
+            if name not in store:
+                with open(filename, 'rb') as f:
+                    store.write(name, f.read())
+            if remove:
+                os.unlink(filename)
+        except Exception as e:
+            print("ERROR: Migrating cache file: " + str(e))
+
+
+def use_log_store(path, migrate_prefix=None):
+    ''' Keep the cache in a single LogStore at path rather than one
+    file per object and interface.  A LogStore has a single writer, so
+    path must be private to the daemon, e.g. CACHE_PATH + 'mydaemon.log'.
+
+    If migrate_prefix is given, the existing cache files of the objects
+    at or below that object path prefix -- those owned by this daemon --
+    are imported and removed.
+    '''
+
+    global _store
+    store = LogStore(path)
+    if migrate_prefix is not None:
+        migrate_files(store, migrate_prefix)
+    _store = store
+    return store
+
+
+class WriteBehind(object):
+    ''' Coalesces saves of each (object path, interface) over interval
+    seconds, writing only the most recent properties when the interval
+    expires.
+    '''
+
+    def __init__(self, interval=5.0):
+        self.interval = interval
+        self.pending = {}
+        self.lock = threading.Lock()
+        # Held while writing, so that an older snapshot taken by one
+        # flush is never written after a newer one taken by another.
+        self.flush_lock = threading.Lock()
+        self.timer = None
+
+    def save(self, obj_path, iface_name, properties):
+        filename = getCacheFilename(obj_path, iface_name)
+        try:
+            data = _serialize(properties, iface_name)
+        except Exception as e:
+            print("ERROR: " + str(e))
+            return
+
+        with self.lock:
+            self.pending[filename] = data
+            if self.timer is None:
+                self.timer = threading.Timer(self.interval, self.flush)
+                self.timer.daemon = True
+                self.timer.start()
+
+    def flush(self, filename=None):
+        ''' Write pending saves now; all of them, or only the save for
+        filename if given.
+        '''
+
+        with self.flush_lock:
+            with self.lock:
+                if filename is not None:
+                    pending = {}
+                    if filename in self.pending:
+                        pending[filename] = self.pending.pop(filename)
+                else:
+                    pending = self.pending
+                    self.pending = {}
+                if not self.pending and self.timer is not None:
+                    self.timer.cancel()
+                    self.timer = None
+
+            for k, v in pending.items():
+                print("Caching: " + k)
+                _write_data(k, v)
+
+
+def enable_write_behind(interval=5.0):
+    ''' Route save() through a WriteBehind cache, flushed at normal
+    interpreter exit.  atexit handlers do not run when the process is
+    killed by a signal, so a daemon stopped with SIGTERM (as systemd
+    does) must call flush() from its signal handler, e.g. one installed
+    with GLib.unix_signal_add, to avoid losing pending saves.
+    '''
+
+    global _write_behind
+    if _write_behind is None:
+        _write_behind = WriteBehind(interval)
+        atexit.register(flush)
+    else:
+        _write_behind.interval = interval
+
+
+def flush():
+    if _write_behind is not None:
+        _write_behind.flush()
+
+
+@tracing.traced(category='propertycacher')
 def save(obj_path, iface_name, properties):
-    print("Caching: "+ obj_path)
+    if _write_behind is not None:
+        _write_behind.save(obj_path, iface_name, properties)
+        return
+
+    print("Caching: " + obj_path)
     filename = getCacheFilename(obj_path, iface_name)
-    parent = os.path.dirname(filename)
     try:
-        if not os.path.exists(parent):
-            os.makedirs(parent)
-        with open(filename, 'wb') as output:
-            try:
-                # use json module to convert dbus datatypes
-                props = json.dumps(properties[iface_name])
-                prop_obj = json.loads(props)
-                pickle.dump(prop_obj, output)
-            except Exception as e:
-                print("ERROR: " + str(e))
-    except Exception:
-        print("ERROR opening cache file: " + filename)
-
-
-def load(obj_path, iface_name, properties):
-    # overlay with pickled data
+        data = _serialize(properties, iface_name)
+    except Exception as e:
+        print("ERROR: " + str(e))
+        return
+    _write_data(filename, data)
+
+
+@tracing.traced(category='propertycacher')
+def load(obj_path, iface_name, properties, signatures=None):
+    ''' Replace properties[iface_name] with the cached values.
+
+    Cached values are restored as native Python types.  If signatures,
+    a dict mapping property names to D-Bus signatures, is given, the
+    named properties are converted back to dbus types.  On any error
+    properties is left unchanged.
+    '''
+
+    # overlay with cached data
     filename = getCacheFilename(obj_path, iface_name)
-    if (os.path.isfile(filename)):
-        if iface_name in properties:
-            properties[iface_name] = {}
-        print("Loading from cache: " + filename)
+    if _write_behind is not None:
+        _write_behind.flush(filename)
+    data = _preloaded.get(filename)
+    if data is None:
+        if _preload_prefixes and _preload_scope(filename):
+            return
         try:
-            p = open(filename, 'rb')
-            data = pickle.load(p)
-            for prop in list(data.keys()):
-                properties[iface_name][prop] = data[prop]
-
+            raw = _read_data(filename)
         except Exception as e:
             print("ERROR: Loading cache file: " + str(e))
-        finally:
-            p.close()
+            return
+        if raw is None:
+            return
+
+    print("Loading from cache: " + filename)
+    try:
+        if data is None:
+            data = _deserialize(raw)
+        loaded = {}
+        for prop in list(data.keys()):
+            value = data[prop]
+            if signatures and prop in signatures:
+                value = from_native(value, signatures[prop])
+            loaded[prop] = value
+    except Exception as e:
+        print("ERROR: Loading cache file: " + str(e))
+        return
+
+    properties[iface_name] = loaded
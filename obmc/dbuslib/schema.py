@@ -0,0 +1,188 @@
+# Contributors Listed Below - COPYRIGHT 2016
+# [+] International Business Machines Corp.
+#
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied. See the License for the specific language governing
+# permissions and limitations under the License.
+
+import numbers
+import dbus
+import dbus.exceptions
+from obmc.dbuslib.enums import DBUS_INVALID_ARGS, DBUS_PROPERTY_READ_ONLY
+from obmc.dbuslib.signature import split_signature
+
+# TODO: openbmc/openbmc#2994 remove python 2 support
+try:  # python 2
+    STRING_TYPES = (basestring,)
+except NameError:  # python 3
+    STRING_TYPES = (str,)
+
+INTEGER_RANGES = {
+    'y': (0, 2 ** 8 - 1),
+    'n': (-2 ** 15, 2 ** 15 - 1),
+    'q': (0, 2 ** 16 - 1),
+    'i': (-2 ** 31, 2 ** 31 - 1),
+    'u': (0, 2 ** 32 - 1),
+    'x': (-2 ** 63, 2 ** 63 - 1),
+    't': (0, 2 ** 64 - 1),
+    'h': (0, 2 ** 32 - 1),
+}
+
+
+def _compile_signature(sig):
+    ''' Compile a single complete D-Bus type into a predicate. '''
+
+    c = sig[0]
+    if c in INTEGER_RANGES:
+        lo, hi = INTEGER_RANGES[c]
+        return lambda v: isinstance(v, numbers.Integral) and lo <= v <= hi
+    if c == 'b':
+        return lambda v: isinstance(v, numbers.Integral) and v in (0, 1)
+    if c == 'd':
+        return lambda v: isinstance(v, numbers.Real)
+    if c in 'sog':
+        return lambda v: isinstance(v, STRING_TYPES)
+    if c == 'v':
+        return lambda v: True
+    if sig.startswith('a{'):
+        key, value = [_compile_signature(x)
+                      for x in split_signature(sig[2:-1])]
+        return lambda v: isinstance(v, dict) and \
+            all(key(k) and value(x) for k, x in v.items())
+    if c == 'a':
+        if sig == 'ay':
+            element = _compile_signature('y')
+            return lambda v: isinstance(v, (bytes, bytearray)) or \
+                (isinstance(v, (list, tuple)) and all(map(element, v)))
+        element = _compile_signature(sig[1:])
+        return lambda v: isinstance(v, (list, tuple)) and \
+            all(map(element, v))
+    if c == '(':
+        fields = [_compile_signature(x) for x in split_signature(sig[1:-1])]
+        return lambda v: isinstance(v, (list, tuple)) and \
+            len(v) == len(fields) and all(f(x) for f, x in zip(fields, v))
+
+    raise ValueError("Invalid signature: '{}'".format(sig))
+
+
+def _invalid(interface_name, property_name, value, reason):
+    return dbus.exceptions.DBusException(
+        "Invalid value for '{}.{}': {!r} ({})".format(
+            interface_name, property_name, value, reason),
+        name=DBUS_INVALID_ARGS)
+
+
+def _read_only(interface_name, property_name):
+    return dbus.exceptions.DBusException(
+        "Property '{}.{}' is read-only".format(interface_name, property_name),
+        name=DBUS_PROPERTY_READ_ONLY)
+
+
+def compile_property(interface_name, property_name, description):
+    ''' Compile a property description into a check(value) function
+    raising DBusException for invalid values, or return None if the
+    description places no constraints on the value.
+
+    Arguments:
+    description -- A dict with any of the keys:
+        type -- A Python type or tuple of types.
+        signature -- A D-Bus signature of a single complete type.
+        min, max -- Inclusive bounds.
+        enum -- A collection of the permitted values.
+    '''
+
+    checks = []
+    if 'signature' in description:
+        sig = description['signature']
+        if len(split_signature(sig)) != 1:
+            raise ValueError("Not a single complete type: '{}'".format(sig))
+        checks.append((_compile_signature(sig), 'expected ' + sig))
+    if 'type' in description:
+        t = description['type']
+        checks.append(
+            (lambda v: isinstance(v, t), 'expected {}'.format(t)))
+    if 'min' in description:
+        lo = description['min']
+        checks.append((lambda v: v >= lo, 'minimum {}'.format(lo)))
+    if 'max' in description:
+        hi = description['max']
+        checks.append((lambda v: v <= hi, 'maximum {}'.format(hi)))
+    if 'enum' in description:
+        allowed = frozenset(description['enum'])
+        checks.append((lambda v: v in allowed, 'not an allowed value'))
+
+    if not checks:
+        return None
+
+    def check(value):
+        for predicate, reason in checks:
+            try:
+                valid = predicate(value)
+            except TypeError:
+                # e.g. a string compared with an int bound, or an
+                # unhashable value looked up in an enum
+                valid = False
+            if not valid:
+                raise _invalid(interface_name, property_name, value, reason)
+
+    return check
+
+
+class Schema(object):
+    ''' A declarative description of the properties of one or more
+    interfaces, compiled once into per-property check functions.
+    Compile a Schema once and share it between objects, rather than
+    passing the raw description to every object.
+
+    Arguments:
+    spec -- A dict mapping interface names to dicts mapping property
+        names to descriptions.  See compile_property for the keys of a
+        description; in addition, 'readonly': True rejects Set calls
+        made over D-Bus.  Properties not described are not checked.
+    '''
+
+    def __init__(self, spec):
+        self.checks = {}
+        self.readonly = set()
+        for interface_name, props in spec.items():
+            checks = self.checks.setdefault(interface_name, {})
+            for property_name, description in props.items():
+                if description.get('readonly'):
+                    self.readonly.add((interface_name, property_name))
+                check = compile_property(
+                    interface_name, property_name, description)
+                if check is not None:
+                    checks[property_name] = check
+
+    def is_readonly(self, interface_name, property_name):
+        return (interface_name, property_name) in self.readonly
+
+    def validate(self, interface_name, property_name, value, remote=False):
+        if remote and (interface_name, property_name) in self.readonly:
+            raise _read_only(interface_name, property_name)
+        check = self.checks.get(interface_name, {}).get(property_name)
+        if check is not None:
+            check(value)
+
+    def validate_many(self, interface_name, prop_dict, remote=False):
+        ''' Validate every property in prop_dict before any is applied,
+        so SetMultiple either applies all of its values or none.
+        '''
+
+        checks = self.checks.get(interface_name, {})
+        readonly = self.readonly
+        for property_name, value in prop_dict.items():
+            if remote and (interface_name, property_name) in readonly:
+                raise _read_only(interface_name, property_name)
+            check = checks.get(property_name)
+            if check is not None:
+                check(value)
@@ -0,0 +1,108 @@
+# Contributors Listed Below - COPYRIGHT 2016
+# [+] International Business Machines Corp.
+#
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied. See the License for the specific language governing
+# permissions and limitations under the License.
+
+import numbers
+try:
+    from dbus import Boolean as DbusBoolean
+except ImportError:
+    DbusBoolean = bool
+# TODO: openbmc/openbmc#2994 remove python 2 support
+try:
+    from time import monotonic
+except ImportError:
+    from time import time as monotonic
+
+EMIT = 'emit'
+SUPPRESS = 'suppress'
+DEFER = 'defer'
+
+
+class SignalPolicy(object):
+    ''' Decide whether a property change warrants a PropertiesChanged
+    signal.
+
+    Arguments:
+    deadband -- Suppress numeric (but not boolean) changes whose
+        absolute difference from the last emitted value is no more than
+        this.
+    deadband_percent -- As deadband, but relative to the last emitted
+        value, in percent.
+    min_interval -- Defer changes arriving less than this many seconds
+        after the last emitted change.
+    max_rate -- Emit at most this many changes per second; changes in
+        excess of the rate are deferred.
+
+    Of the changes deferred by min_interval or max_rate, the latest is
+    emitted when the interval expires (trailing edge), so the final
+    value of a burst is always signalled.
+    '''
+
+    def __init__(
+            self, deadband=None, deadband_percent=None, min_interval=None,
+            max_rate=None):
+        self.deadband = deadband
+        self.deadband_percent = deadband_percent
+        self.min_interval = min_interval
+        self.period = 1.0 / max_rate if max_rate else None
+
+    def in_deadband(self, last_value, value):
+        if self.deadband is None and self.deadband_percent is None:
+            return False
+        if not isinstance(value, numbers.Number) or \
+                not isinstance(last_value, numbers.Number):
+            return False
+        # Booleans are numbers to python, but every change matters.
+        if isinstance(value, (bool, DbusBoolean)) or \
+                isinstance(last_value, (bool, DbusBoolean)):
+            return False
+
+        delta = abs(value - last_value)
+        if self.deadband is not None and delta <= self.deadband:
+            return True
+        if self.deadband_percent is not None and \
+                delta <= abs(last_value) * self.deadband_percent / 100.0:
+            return True
+        return False
+
+    def check(self, last, value, now):
+        ''' Returns an (action, delay) tuple, where action is one of
+        EMIT, SUPPRESS or DEFER and delay is the number of seconds to
+        wait before flushing a deferred change.
+
+        Arguments:
+        last -- A (value, time) tuple describing the last emitted
+            change, or None if no change has been emitted.
+        value -- The new property value.
+        now -- The current time, from monotonic().
+        '''
+
+        if last is None:
+            return EMIT, None
+
+        last_value, last_time = last
+        if self.in_deadband(last_value, value):
+            return SUPPRESS, None
+
+        elapsed = now - last_time
+        delay = 0
+        if self.min_interval is not None:
+            delay = self.min_interval - elapsed
+        if self.period is not None:
+            delay = max(delay, self.period - elapsed)
+        if delay > 0:
+            return DEFER, delay
+
+        return EMIT, None
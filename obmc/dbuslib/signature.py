@@ -0,0 +1,112 @@
+# Contributors Listed Below - COPYRIGHT 2016
+# [+] International Business Machines Corp.
+#
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied. See the License for the specific language governing
+# permissions and limitations under the License.
+
+import dbus
+
+# Ordered so that subclasses are matched before their bases (ObjectPath
+# and Signature derive from str, dbus.Boolean derives from int).
+DBUS_TYPE_SIGNATURES = [
+    (dbus.Boolean, 'b'),
+    (dbus.Byte, 'y'),
+    (dbus.Int16, 'n'),
+    (dbus.UInt16, 'q'),
+    (dbus.Int32, 'i'),
+    (dbus.UInt32, 'u'),
+    (dbus.Int64, 'x'),
+    (dbus.UInt64, 't'),
+    (dbus.Double, 'd'),
+    (dbus.ObjectPath, 'o'),
+    (dbus.Signature, 'g'),
+    (dbus.String, 's'),
+]
+
+
+def guess_signature(value):
+    ''' Guess the D-Bus signature of a value the way dbus-python would
+    marshal it: explicit dbus types are honoured and native Python
+    types are guessed from their contents.
+    '''
+
+    if getattr(value, 'variant_level', 0):
+        return 'v'
+
+    for t, sig in DBUS_TYPE_SIGNATURES:
+        if isinstance(value, t):
+            return sig
+
+    if isinstance(value, dbus.Dictionary):
+        if value.signature:
+            return 'a{' + value.signature + '}'
+    elif isinstance(value, dbus.Array):
+        if value.signature:
+            return 'a' + value.signature
+    elif isinstance(value, dbus.Struct):
+        if value.signature:
+            return '(' + value.signature + ')'
+
+    if isinstance(value, bool):
+        return 'b'
+    if isinstance(value, int):
+        return 'i' if -2 ** 31 <= value < 2 ** 31 else 'x'
+    if isinstance(value, float):
+        return 'd'
+    if isinstance(value, bytes) and not isinstance(value, str):
+        return 'ay'
+    if isinstance(value, str) or isinstance(value, type(u'')):
+        return 's'
+    if isinstance(value, dict):
+        for k, v in value.items():
+            return 'a{' + guess_signature(k) + guess_signature(v) + '}'
+        return 'a{sv}'
+    if isinstance(value, tuple):
+        return '(' + ''.join(guess_signature(x) for x in value) + ')'
+    if isinstance(value, list):
+        if value:
+            return 'a' + guess_signature(value[0])
+        return 'av'
+
+    return 'v'
+
+
+def _complete_type_end(sig, start):
+    c = sig[start]
+    if c == 'a':
+        return _complete_type_end(sig, start + 1)
+    if c in '({':
+        close = ')' if c == '(' else '}'
+        i = start + 1
+        while sig[i] != close:
+            i = _complete_type_end(sig, i)
+        return i + 1
+    return start + 1
+
+
+def split_signature(sig):
+    ''' Split a D-Bus signature into its complete types, e.g.
+    'sa{sv}(ii)' -> ['s', 'a{sv}', '(ii)'].
+    '''
+
+    types = []
+    i = 0
+    try:
+        while i < len(sig):
+            end = _complete_type_end(sig, i)
+            types.append(sig[i:end])
+            i = end
+    except IndexError:
+        raise ValueError("Invalid signature: '{}'".format(sig))
+
+    return types
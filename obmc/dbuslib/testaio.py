@@ -0,0 +1,119 @@
+import asyncio
+import threading
+import unittest
+
+try:
+    import dbus
+    from .aio import AsyncBus
+except ImportError:  # dbus-python is not installed
+    AsyncBus = None
+
+NODES = {
+    '/': ['xyz'],
+    '/xyz': ['a', 'b'],
+    '/xyz/a': [],
+    '/xyz/b': [],
+}
+
+
+def introspect_xml(path):
+    xml = ['<node>']
+    if path.startswith('/xyz/'):
+        xml.append('<interface name="org.test.A"/>')
+    xml.extend('<node name="{}"/>'.format(x) for x in NODES[path])
+    xml.append('</node>')
+    return ''.join(xml)
+
+
+class FakeBus(object):
+    ''' Replies to calls from another thread, as a GLib loop would. '''
+
+    def __init__(self):
+        self.calls = []
+        self.signatures = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+
+    def call_async(self, bus_name, object_path, interface, method,
+                   signature, args, reply, error, timeout=-1):
+        with self.lock:
+            self.calls.append((object_path, method))
+            self.signatures.append(signature)
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+
+        def respond():
+            with self.lock:
+                self.in_flight -= 1
+            if object_path == '/missing':
+                error(dbus.DBusException('no such object'))
+            elif method == 'Introspect':
+                reply(introspect_xml(object_path))
+            elif method == 'GetAll':
+                reply(dbus.Dictionary(
+                    {'path': dbus.String(object_path)}, signature='sv'))
+            elif method == 'Set':
+                reply()
+
+        threading.Timer(0.01, respond).start()
+
+
+@unittest.skipIf(AsyncBus is None, 'dbus-python is not available')
+class AsyncBusTest(unittest.TestCase):
+    def setUp(self):
+        self.fake = FakeBus()
+        self.bus = AsyncBus(self.fake, limit=4)
+
+    def run_async(self, coro):
+        loop = asyncio.new_event_loop()
+        try:
+            return loop.run_until_complete(coro)
+        finally:
+            loop.close()
+
+    def test_get_all(self):
+        result = self.run_async(
+            self.bus.get_all('org.test', '/xyz/a', 'org.test.A'))
+        self.assertEqual({'path': '/xyz/a'}, result)
+
+    def test_get_all_native(self):
+        result = self.run_async(self.bus.get_all(
+            'org.test', '/xyz/a', 'org.test.A', native=True))
+        self.assertIs(type(result['path']), str)
+
+    def test_set(self):
+        self.assertIsNone(self.run_async(
+            self.bus.set('org.test', '/xyz/a', 'org.test.A', 'x', 1)))
+        self.assertEqual([('/xyz/a', 'Set')], self.fake.calls)
+        self.assertEqual(['ssv'], self.fake.signatures)
+
+    def test_error(self):
+        with self.assertRaises(dbus.DBusException):
+            self.run_async(
+                self.bus.get_all('org.test', '/missing', 'org.test.A'))
+
+    def test_get_all_many(self):
+        requests = [('org.test', '/xyz/{}'.format(i), 'org.test.A')
+                    for i in range(0, 20)]
+        results = self.run_async(self.bus.get_all_many(requests))
+        self.assertEqual(
+            ['/xyz/{}'.format(i) for i in range(0, 20)],
+            [x['path'] for x in results])
+        self.assertLessEqual(self.fake.max_in_flight, 4)
+        self.assertGreater(self.fake.max_in_flight, 1)
+
+    def test_get_all_many_exceptions(self):
+        requests = [('org.test', '/xyz/a', 'org.test.A'),
+                    ('org.test', '/missing', 'org.test.A')]
+        results = self.run_async(
+            self.bus.get_all_many(requests, return_exceptions=True))
+        self.assertIsInstance(results[1], dbus.DBusException)
+
+    def test_introspect(self):
+        result = self.run_async(self.bus.introspect('org.test'))
+        self.assertEqual(
+            {'/xyz/a': {'interfaces': ['org.test.A']},
+             '/xyz/b': {'interfaces': ['org.test.A']}},
+            result)
+        self.assertEqual(4, len(self.fake.calls))
@@ -0,0 +1,138 @@
+import unittest
+
+from .associations import AssociationIndex
+
+IFACE = 'org.openbmc.Associations'
+
+
+class FakeObject(object):
+    def __init__(self, associations):
+        self.properties = {IFACE: {'associations': associations}}
+        self.listeners = []
+
+    def add_change_listener(self, callback):
+        self.listeners.append(callback)
+
+    def remove_change_listener(self, callback):
+        self.listeners.remove(callback)
+
+    def set(self, associations):
+        self.properties[IFACE]['associations'] = associations
+        for callback in self.listeners:
+            callback(IFACE, {'associations': associations})
+
+
+class AssociationIndexTest(unittest.TestCase):
+    def setUp(self):
+        self.index = AssociationIndex(IFACE)
+
+    def test_set(self):
+        self.index.set('/dimm0', [('chassis', 'contains', '/chassis')])
+        self.assertEqual(
+            ['/chassis'], self.index.endpoints('/dimm0', 'chassis'))
+        self.assertEqual(
+            ['/dimm0'], self.index.endpoints('/chassis', 'contains'))
+        self.assertEqual([], self.index.endpoints('/dimm0', 'contains'))
+        self.assertEqual([], self.index.endpoints('/nope', 'chassis'))
+
+    def test_replace(self):
+        self.index.set('/dimm0', [('chassis', 'contains', '/chassis')])
+        self.index.set('/dimm0', [('chassis', 'contains', '/chassis1')])
+        self.assertEqual(
+            ['/chassis1'], self.index.endpoints('/dimm0', 'chassis'))
+        self.assertEqual([], self.index.endpoints('/chassis', 'contains'))
+        self.assertNotIn('/chassis', self.index)
+
+    def test_remove(self):
+        self.index.set('/dimm0', [('chassis', 'contains', '/chassis')])
+        self.index.set('/dimm1', [('chassis', 'contains', '/chassis')])
+        self.index.remove('/dimm0')
+        self.assertEqual(
+            ['/dimm1'], self.index.endpoints('/chassis', 'contains'))
+        self.index.remove('/dimm1')
+        self.assertEqual(0, len(self.index))
+
+    def test_refcount(self):
+        self.index.set('/a', [('peer', 'peer', '/b')])
+        self.index.set('/b', [('peer', 'peer', '/a')])
+        self.index.remove('/a')
+        self.assertEqual(['/b'], self.index.endpoints('/a', 'peer'))
+        self.assertEqual(['/a'], self.index.endpoints('/b', 'peer'))
+        self.index.remove('/b')
+        self.assertEqual([], self.index.endpoints('/a', 'peer'))
+
+    def test_relations(self):
+        self.index.set('/a', [('x', 'rx', '/b'), ('y', '', '/c')])
+        self.assertEqual(set(['x', 'y']), set(self.index.relations('/a')))
+        self.assertEqual([], self.index.relations('/c'))
+
+    def test_signals(self):
+        self.index.interfaces_added('/a', {
+            IFACE: {'associations': [('x', 'rx', '/b')]},
+            'org.other': {}})
+        self.assertEqual(['/b'], self.index.endpoints('/a', 'x'))
+        self.index.properties_changed(
+            IFACE, {'associations': [('x', 'rx', '/c')]}, [], path='/a')
+        self.assertEqual(['/a'], self.index.endpoints('/c', 'rx'))
+        self.index.properties_changed('org.other', {'associations': []},
+                                      [], path='/a')
+        self.assertEqual(['/c'], self.index.endpoints('/a', 'x'))
+        self.index.interfaces_removed('/a', [IFACE])
+        self.assertEqual(0, len(self.index))
+
+    def test_ingest(self):
+        self.index.ingest({
+            '/a': {IFACE: {'associations': [('x', 'rx', '/b')]}},
+            '/b': {'org.other': {}}})
+        self.assertEqual(['/a'], self.index.endpoints('/b', 'rx'))
+
+    def test_watch(self):
+        obj = FakeObject([('x', 'rx', '/b')])
+        self.index.watch('/a', obj)
+        self.assertEqual(['/b'], self.index.endpoints('/a', 'x'))
+        obj.set([('x', 'rx', '/c')])
+        self.assertEqual(['/c'], self.index.endpoints('/a', 'x'))
+        self.index.unwatch('/a', obj)
+        self.assertEqual([], obj.listeners)
+        self.assertEqual(0, len(self.index))
+
+
+if __name__ == '__main__':
+    import timeit
+
+    setup = """\
+from obmc.dbuslib.associations import AssociationIndex
+prefix = '/xyz/openbmc_project/inventory/system/chassis'
+owners = {{}}
+for i in range(0, {}):
+    owners['{{}}/item{{}}'.format(prefix, i)] = [
+        ('chassis', 'contains', prefix),
+        ('sensors', 'inventory', '/sensors/s{{}}'.format(i)),
+        ('leds', 'inventory', '/leds/l{{}}'.format(i % 100))]
+index = AssociationIndex('org.openbmc.Associations')
+for k, v in owners.items():
+    index.set(k, v)
+target = '/leds/l7'
+
+def scan():
+    return [k for k, v in owners.items()
+            for f, r, e in v if e == target and r == 'inventory']
+"""
+
+    for n in (1000, 10000, 100000):
+        t = timeit.timeit(
+            "index = AssociationIndex('org.openbmc.Associations')\n"
+            "for k, v in owners.items():\n"
+            "    index.set(k, v)", setup=setup.format(n), number=1)
+        print('{} objects, build: {:.1f} ms'.format(n, t * 1000))
+        for label, stmt in (
+                ('scan', 'scan()'),
+                ('index', "index.endpoints(target, 'inventory')")):
+            t = timeit.timeit(stmt, setup=setup.format(n), number=20)
+            print('{} objects, {} lookup: {:.3f} ms'.format(
+                n, label, t / 20 * 1000))
+        t = timeit.timeit(
+            "index.set(prefix + '/item1', [('chassis', 'contains', prefix)])\n"
+            "index.set(prefix + '/item1', owners[prefix + '/item1'])",
+            setup=setup.format(n), number=1000)
+        print('{} objects, update: {:.3f} ms'.format(n, t))
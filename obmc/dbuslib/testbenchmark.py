@@ -0,0 +1,40 @@
+import os
+import unittest
+
+try:
+    from . import benchmark
+except ImportError:  # dbus-python is not installed
+    benchmark = None
+
+
+@unittest.skipIf(benchmark is None, 'dbus-python is not available')
+class BenchmarkTest(unittest.TestCase):
+    def test_make_properties(self):
+        props = benchmark.make_properties(3, 2, 4)
+        self.assertEqual(2, len(props))
+        iface = props[benchmark.interface_name(1)]
+        self.assertEqual(3, iface['Property0'])
+        self.assertEqual('value3', iface['Property1'])
+        self.assertEqual(4, len(iface))
+
+    def test_private_bus(self):
+        try:
+            with benchmark.PrivateBus() as bus:
+                self.assertTrue(bus.address.startswith('unix:path='))
+                tmpdir = bus.tmpdir
+        except OSError:
+            self.skipTest('dbus-daemon is not available')
+        self.assertFalse(os.path.exists(tmpdir))
+
+    def test_benchmark(self):
+        try:
+            results = benchmark.benchmark(
+                [10], calls=20, signals=50, repeat=1, timeout=30)
+        except OSError:
+            self.skipTest('dbus-daemon is not available')
+        result = results['results'][0]
+        self.assertEqual(10, result['objects'])
+        self.assertEqual(20, result['get']['count'])
+        self.assertEqual(50, result['signals']['received'])
+        # the objects, their manager and the control object
+        self.assertEqual(12, result['introspect_crawl']['paths'])
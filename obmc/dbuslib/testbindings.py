@@ -0,0 +1,249 @@
+import unittest
+
+try:
+    import dbus
+    from gi.repository import GLib
+    from .bindings import DbusProperties, DbusObjectManager, add_interfaces
+    from .bindings import PropertyProvider
+except ImportError:  # dbus-python or PyGObject is not installed
+    DbusProperties = None
+
+@unittest.skipIf(DbusProperties is None, 'dbus-python is not available')
+class DbusPropertiesTest(unittest.TestCase):
+    def test_add_interfaces_at_decoration(self):
+        @add_interfaces(['org.test.A', 'org.test.B'])
+        class Decorated(DbusProperties):
+            pass
+
+        key = '{}.{}'.format(Decorated.__module__, Decorated.__name__)
+        table = Decorated._dbus_class_table[key]
+        self.assertIn('org.test.A', table)
+        self.assertIn('org.test.B', table)
+
+    def test_create_many(self):
+        objs = DbusProperties.create_many(
+            [(None, {'org.test.A': {'x': 1}}), (None, {})])
+        self.assertEqual(2, len(objs))
+        self.assertEqual(1, objs[0].Get('org.test.A', 'x'))
+        self.assertEqual({}, objs[1].properties)
+
+    def test_create_many_copies(self):
+        props = {'org.test.A': {'x': 1}}
+        objs = DbusProperties.create_many([(None, props), (None, props)])
+        objs[0].Set('org.test.A', 'x', 2)
+        self.assertEqual(1, objs[1].Get('org.test.A', 'x'))
+        self.assertEqual({'org.test.A': {'x': 1}}, props)
+
+    def test_set_multiple_reports_changed(self):
+        obj = DbusProperties()
+        obj.unmask_signals()
+        signals = []
+        obj.PropertiesChanged = lambda i, c, x: signals.append((i, c))
+        obj.SetMultiple('org.test.A', {'x': 1, 'y': 2})
+        obj.SetMultiple('org.test.A', {'x': 1, 'y': 3})
+        self.assertEqual(
+            [('org.test.A', {'x': 1, 'y': 2}), ('org.test.A', {'y': 3})],
+            signals)
+
+    def test_batch(self):
+        obj = DbusProperties()
+        obj.unmask_signals()
+        signals = []
+        obj.PropertiesChanged = lambda i, c, x: signals.append((i, c))
+        with obj.batch():
+            obj.Set('org.test.A', 'x', 1)
+            obj.Set('org.test.A', 'y', 2)
+            obj.Set('org.test.B', 'z', 3)
+            self.assertEqual([], signals)
+        self.assertEqual(
+            {'org.test.A': {'x': 1, 'y': 2}, 'org.test.B': {'z': 3}},
+            dict(signals))
+
+    def test_provider_ttl(self):
+        obj = DbusProperties()
+        reads = []
+        obj.add_property_provider(
+            'org.test.A', 'x', lambda: reads.append(1) or len(reads),
+            ttl=60)
+        self.assertEqual(1, obj.Get('org.test.A', 'x'))
+        self.assertEqual({'x': 1}, obj.GetAll('org.test.A'))
+        self.assertEqual(1, len(reads))
+
+    def test_provider_stale_while_revalidate(self):
+        obj = DbusProperties()
+        obj.unmask_signals()
+        signals = []
+        obj.PropertiesChanged = lambda i, c, x: signals.append((i, c))
+        reads = []
+        obj.add_property_provider(
+            'org.test.A', 'x', lambda: reads.append(1) or len(reads),
+            stale_ttl=60)
+        self.assertEqual(1, obj.Get('org.test.A', 'x'))
+        # Stale: the cached value is served and one refresh scheduled
+        self.assertEqual(1, obj.Get('org.test.A', 'x'))
+        self.assertEqual(1, obj.Get('org.test.A', 'x'))
+        self.assertEqual(1, len(reads))
+
+        context = GLib.MainContext.default()
+        while context.iteration(False):
+            pass
+        self.assertEqual(2, len(reads))
+        self.assertEqual({'x': 2}, obj.properties['org.test.A'])
+        self.assertEqual(
+            [('org.test.A', {'x': 1}), ('org.test.A', {'x': 2})], signals)
+
+    def test_class_schema_compiled_once(self):
+        class Schemed(DbusProperties):
+            schema = {'org.test.A': {'x': {'max': 10}}}
+
+        a, b = Schemed(), Schemed()
+        self.assertIs(a.schema, b.schema)
+        self.assertEqual(
+            {'org.test.A': {'x': {'max': 10}}}, Schemed.schema)
+        with self.assertRaises(dbus.exceptions.DBusException):
+            a.Set('org.test.A', 'x', 11)
+
+        class Other(Schemed):
+            schema = {'org.test.A': {'x': {'max': 20}}}
+
+        Other().Set('org.test.A', 'x', 11)
+        self.assertIs(a.schema, Schemed().schema)
+
+    def test_introspect_properties(self):
+        obj = DbusProperties()
+        obj.Set('org.test.A', 'x', 1)
+        xml = obj._introspect_body()
+        self.assertIn('<interface name="org.test.A">', xml)
+        self.assertIn(
+            '<property name="x" type="i" access="readwrite"/>', xml)
+        self.assertIs(xml, obj._introspect_body())
+        obj.Set('org.test.A', 'y', 'z')
+        self.assertIn(
+            '<property name="y" type="s" access="readwrite"/>',
+            obj._introspect_body())
+
+
+@unittest.skipIf(DbusProperties is None, 'dbus-python is not available')
+class PropertyProviderTest(unittest.TestCase):
+    def test_stale_schedules_once(self):
+        provider = PropertyProvider(lambda: 1, stale_ttl=60)
+        scheduled = []
+        schedule = lambda: scheduled.append(1)
+        self.assertEqual((1, True), provider.read())
+        self.assertEqual((1, False), provider.read(schedule))
+        self.assertEqual((1, False), provider.read(schedule))
+        self.assertEqual([1], scheduled)
+        provider.refresh()
+        self.assertFalse(provider.revalidating)
+
+    def test_refresh_error_allows_retry(self):
+        values = [1]
+
+        def func():
+            if not values:
+                raise IOError('sensor read failed')
+            return values.pop()
+
+        provider = PropertyProvider(func, stale_ttl=60)
+        scheduled = []
+        schedule = lambda: scheduled.append(1)
+        provider.read(schedule)
+        provider.read(schedule)
+        self.assertRaises(IOError, provider.refresh)
+        self.assertFalse(provider.revalidating)
+        # The stale value is still served, and a new refresh scheduled
+        self.assertEqual((1, False), provider.read(schedule))
+        self.assertEqual([1, 1], scheduled)
+
+
+@unittest.skipIf(DbusProperties is None, 'dbus-python is not available')
+class DbusObjectManagerTest(unittest.TestCase):
+    def props(self):
+        # Objects are not exported to a bus in these tests.
+        obj = DbusProperties()
+        obj.remove_from_connection = lambda: None
+        return obj
+
+    def test_subtree(self):
+        mgr = DbusObjectManager()
+        objs = DbusProperties.create_many(
+            [(None, {'a': {}}), (None, {'b': {}}), (None, {'c': {}})])
+        mgr.add_many(zip(['/a', '/a/b', '/c'], objs))
+        self.assertEqual(
+            set(['/a', '/a/b']),
+            set(mgr.get_managed_objects('/a').keys()))
+        self.assertEqual(
+            set(['/a', '/a/b', '/c']), set(mgr.GetManagedObjects().keys()))
+
+        for obj in objs:
+            obj.remove_from_connection = lambda: None
+        mgr.remove_subtree('/a')
+        self.assertEqual(['/c'], list(mgr.GetManagedObjects().keys()))
+
+    def test_cached_reply(self):
+        mgr = DbusObjectManager(cache_reply=True)
+        obj = self.props()
+        mgr.add('/a', obj)
+        obj.Set('i', 'x', 1)
+        self.assertEqual({'/a': {'i': {'x': 1}}}, mgr.GetManagedObjects())
+        obj.Set('i', 'x', 2)
+        self.assertEqual({'/a': {'i': {'x': 2}}}, mgr.GetManagedObjects())
+        mgr.remove('/a')
+        self.assertEqual({}, mgr.GetManagedObjects())
+
+    def test_uncached_reply_is_live(self):
+        mgr = DbusObjectManager()
+        obj = self.props()
+        mgr.add('/a', obj)
+        obj.properties = {'i': {'x': 1}}
+        self.assertEqual({'/a': {'i': {'x': 1}}}, mgr.GetManagedObjects())
+        self.assertEqual(
+            {'/a': {'i': {'x': 1}}}, mgr.get_managed_objects('/a'))
+
+    def test_uncached_reply_tracks_nothing(self):
+        mgr = DbusObjectManager()
+        obj = self.props()
+        mgr.add('/a', obj)
+        mgr.add('/a/b', self.props())
+        obj.Set('i', 'x', 1)
+        mgr.invalidate()
+        mgr.remove_subtree('/a')
+        self.assertEqual(set(), mgr._dirty)
+        self.assertEqual({}, mgr._listeners)
+
+
+import timeit
+
+construct_setup = """\
+n = %d
+from obmc.dbuslib.bindings import DbusProperties, add_interfaces
+ifaces = ['org.test.I{}'.format(i) for i in range(0, 8)]
+
+@add_interfaces(ifaces)
+class Obj(DbusProperties):
+    pass
+
+items = [(None, dict((i, dict(('p{}'.format(j), j) for j in range(0, 8)))
+                      for i in ifaces))
+         for x in range(0, n)]
+"""
+
+construct_set = """\
+for path, p in items:
+    o = Obj(object_path=path)
+    for i, d in p.items():
+        for k, v in d.items():
+            o.Set(i, k, v)
+"""
+
+construct_many = "Obj.create_many(items)"
+
+if __name__ == "__main__":
+    print("Construction tests (8 interfaces x 8 properties per object):")
+    for n in (100, 1000, 10000):
+        setup = construct_setup % n
+        for name, stmt in (('Set', construct_set),
+                           ('create_many', construct_many)):
+            time = timeit.timeit(stmt, setup=setup, number=1)
+            print("\t{}: n={}: {} ({} us/object)".format(
+                name, n, time, time * 1e6 / n))
@@ -0,0 +1,123 @@
+import unittest
+
+from . import codec
+
+VALUE = {
+    'Int': 1,
+    'Neg': -2 ** 40,
+    'Big': 2 ** 63,
+    'Bool': True,
+    'Dbl': 1.5,
+    'Str': u'café',
+    'Bytes': b'\x00\xff',
+    'List': [1, 'a', [2.0]],
+    'Struct': (1, 'b'),
+    'Dict': {'a': {'b': []}, 1: 'c'},
+}
+
+class BinaryCodecTest(unittest.TestCase):
+    def setUp(self):
+        self.codec = codec.get_codec('binary')
+
+    def test_round_trip(self):
+        data = self.codec.encode(VALUE)
+        self.assertTrue(data.startswith(codec.BINARY_MAGIC))
+        self.assertEqual(VALUE, self.codec.decode(data))
+
+    def test_homogeneous(self):
+        value = {'a': [1, 2, 3], 'b': [u'x', u'', u'z'], 'c': [1.5, 2.5],
+                 'd': [True, False], 'e': [[1], [2]], 'f': [],
+                 'g': {1: [1, u'a']}}
+        self.assertEqual(value, self.codec.decode(self.codec.encode(value)))
+
+    def test_nul(self):
+        with self.assertRaises(ValueError):
+            self.codec.encode({'a': u'x\0y'})
+
+    def test_corrupt(self):
+        data = self.codec.encode(VALUE)
+        for bad in (data[:-1], data + b'\0', data[:8]):
+            with self.assertRaises(ValueError):
+                self.codec.decode(bad)
+
+    def test_bad_version(self):
+        data = bytearray(self.codec.encode(1))
+        data[len(codec.BINARY_MAGIC)] = 99
+        with self.assertRaises(ValueError):
+            self.codec.decode(bytes(data))
+
+    def test_unsupported(self):
+        with self.assertRaises(TypeError):
+            self.codec.encode(object())
+
+    @unittest.skipIf(codec.dbus is None, 'dbus-python is not available')
+    def test_typed(self):
+        dbus = codec.dbus
+        value = {'a': dbus.UInt16(3), 'b': dbus.ObjectPath('/x')}
+        decoded = self.codec.decode(self.codec.encode(value), typed=True)
+        self.assertIsInstance(decoded['a'], dbus.UInt16)
+        self.assertIsInstance(decoded['b'], dbus.ObjectPath)
+
+    @unittest.skipIf(codec.dbus is None, 'dbus-python is not available')
+    def test_typed_arrays(self):
+        dbus = codec.dbus
+        value = [dbus.Array([dbus.UInt32(1), dbus.UInt32(2)]),
+                 [dbus.ObjectPath('/a'), dbus.ObjectPath('/b')],
+                 (dbus.String('s'), dbus.Byte(1))]
+        decoded = self.codec.decode(self.codec.encode(value), typed=True)
+        self.assertEqual([[1, 2], ['/a', '/b'], ('s', 1)], decoded)
+        self.assertIsInstance(decoded[0][1], dbus.UInt32)
+        self.assertIsInstance(decoded[1][0], dbus.ObjectPath)
+        self.assertIsInstance(decoded[2][1], dbus.Byte)
+
+    def test_untyped_native_int(self):
+        decoded = self.codec.decode(self.codec.encode({'a': 5}))
+        self.assertIs(int, type(decoded['a']))
+
+
+class DecodeTest(unittest.TestCase):
+    def test_detect(self):
+        value = {'a': [1, 2], 'b': 'c'}
+        for name in ('binary', 'json', 'pickle'):
+            data = codec.get_codec(name).encode(value)
+            self.assertEqual(value, codec.decode(data))
+
+    def test_refuse_pickle(self):
+        data = codec.get_codec('pickle').encode({'a': 1})
+        with self.assertRaises(ValueError):
+            codec.decode(data, allow_pickle=False)
+
+    def test_unknown_codec(self):
+        with self.assertRaises(ValueError):
+            codec.get_codec('xml')
+
+import timeit
+
+codec_setup = """\
+from obmc.dbuslib.testcodec import make_props
+from obmc.dbuslib import codec
+c = codec.get_codec('{}')
+data = c.encode(make_props({}))
+"""
+
+def make_props(n):
+    props = {}
+    for i in range(0, n):
+        props['Int{}'.format(i)] = i * 1000
+        props['Str{}'.format(i)] = 'value {}'.format(i)
+        props['Dbl{}'.format(i)] = i / 3.0
+        props['Arr{}'.format(i)] = ['a', 'b']
+    return props
+
+if __name__ == "__main__":
+    print("Codec tests (4 properties per n):")
+    for n in (1, 10, 100, 1000):
+        for name in ('pickle', 'json', 'binary'):
+            setup = codec_setup.format(name, n)
+            size = len(codec.get_codec(name).encode(make_props(n)))
+            load = timeit.timeit('c.decode(data)', setup=setup, number=1000)
+            dump = timeit.timeit(
+                'c.encode(make_props({}))'.format(n), setup=setup,
+                number=1000)
+            print("\t{}: n={}: size={} decode={} encode={}".format(
+                name, n, size, load, dump))
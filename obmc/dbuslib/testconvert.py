@@ -0,0 +1,88 @@
+import unittest
+
+from . import convert
+from .convert import to_native, from_native
+
+class ToNativeTest(unittest.TestCase):
+    def test_scalars(self):
+        class S(str):
+            pass
+
+        class I(int):
+            pass
+
+        for v in (S('a'), I(1)):
+            self.assertIs(type(v).__bases__[0], type(to_native(v)))
+
+    def test_containers(self):
+        v = {'a': [1, (2.0, 'b')], 1: {'c': True}}
+        self.assertEqual(v, to_native(v))
+
+    def test_bytes(self):
+        self.assertEqual(b'xy', to_native(bytearray(b'xy')))
+
+    def test_unsupported(self):
+        with self.assertRaises(TypeError):
+            to_native(object())
+
+
+@unittest.skipIf(convert.dbus is None, 'dbus-python is not available')
+class DbusConvertTest(unittest.TestCase):
+    def test_boolean(self):
+        self.assertIs(True, to_native(convert.dbus.Boolean(1)))
+
+    def test_round_trip(self):
+        dbus = convert.dbus
+        v = dbus.Dictionary({
+            'a': dbus.Array([dbus.Byte(1)], signature='y'),
+            'b': dbus.Struct((dbus.UInt64(2), dbus.ObjectPath('/x')),
+                             signature='to'),
+        }, signature='sv')
+        native = to_native(v)
+        self.assertEqual({'a': [1], 'b': (2, '/x')}, native)
+        typed = from_native(native['b'], '(to)')
+        self.assertIsInstance(typed, dbus.Struct)
+        self.assertIsInstance(typed[0], dbus.UInt64)
+        self.assertIsInstance(typed[1], dbus.ObjectPath)
+        typed = from_native({'k': [1, 2]}, 'a{sau}')
+        self.assertIsInstance(typed['k'][0], dbus.UInt32)
+
+import json
+import timeit
+
+convert_setup = """\
+from obmc.dbuslib.testconvert import make_props, json_round_trip
+from obmc.dbuslib.convert import to_native
+props = make_props({})
+"""
+
+def make_props(n):
+    try:
+        import dbus
+        props = dbus.Dictionary(signature='sv')
+        for i in range(0, n):
+            props['Int{}'.format(i)] = dbus.Int64(i)
+            props['Str{}'.format(i)] = dbus.String('value {}'.format(i))
+            props['Dbl{}'.format(i)] = dbus.Double(i / 3.0)
+            props['Arr{}'.format(i)] = dbus.Array(
+                [dbus.String('a'), dbus.String('b')], signature='s')
+    except ImportError:
+        props = {}
+        for i in range(0, n):
+            props['Int{}'.format(i)] = i
+            props['Str{}'.format(i)] = 'value {}'.format(i)
+            props['Dbl{}'.format(i)] = i / 3.0
+            props['Arr{}'.format(i)] = ['a', 'b']
+    return props
+
+def json_round_trip(props):
+    return json.loads(json.dumps(props))
+
+if __name__ == "__main__":
+    print("Conversion tests (4 properties per n):")
+    for n in (1, 10, 100, 1000):
+        setup = convert_setup.format(n)
+        for name, stmt in (('json', 'json_round_trip(props)'),
+                           ('to_native', 'to_native(props)')):
+            time = timeit.timeit(stmt, setup=setup, number=1000)
+            print("\t{}: n={}: {}".format(name, n, time))
@@ -0,0 +1,34 @@
+import unittest
+
+from . import instrumentation
+
+class InstrumentationTest(unittest.TestCase):
+    def setUp(self):
+        instrumentation.reset()
+
+    def test_record_call(self):
+        instrumentation.record_call('org.test.A', 'Get', 0.00002)
+        instrumentation.record_call('org.test.A', 'Get', 2)
+        d = instrumentation.dump()['methods']['org.test.A.Get']
+        self.assertEqual(2, d['count'])
+        self.assertEqual(2, d['max'])
+        self.assertEqual(1, d['buckets'][1])
+        self.assertEqual(1, d['buckets'][-1])
+
+    def test_record_signal(self):
+        instrumentation.record_signal('org.test.A', 'PropertiesChanged')
+        instrumentation.record_signal('org.test.A', 'PropertiesChanged', 2)
+        self.assertEqual(
+            {'org.test.A.PropertiesChanged': 3},
+            instrumentation.dump()['signals'])
+
+    def test_timed(self):
+        with instrumentation.timed('org.test.A', 'Set'):
+            pass
+        self.assertEqual(
+            1, instrumentation.dump()['methods']['org.test.A.Set']['count'])
+
+    def test_reset(self):
+        instrumentation.record_signal('org.test.A', 'PropertiesChanged')
+        instrumentation.reset()
+        self.assertEqual({}, instrumentation.dump()['signals'])
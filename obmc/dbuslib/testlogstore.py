@@ -0,0 +1,72 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from .logstore import LogStore
+
+class LogStoreTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, 'store.log')
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_empty(self):
+        store = LogStore(self.path)
+        self.assertIsNone(store.read('a'))
+        self.assertEqual([], store.keys())
+
+    def test_write_read(self):
+        store = LogStore(self.path)
+        store.write('a', b'1')
+        store.write('b', b'2')
+        store.write('a', b'3')
+        self.assertEqual(b'3', store.read('a'))
+        store.close()
+        store = LogStore(self.path)
+        self.assertEqual(b'3', store.read('a'))
+        self.assertEqual(b'2', store.read('b'))
+
+    def test_delete(self):
+        store = LogStore(self.path)
+        store.write('a', b'1')
+        store.delete('a')
+        store.close()
+        self.assertNotIn('a', LogStore(self.path))
+
+    def test_single_writer(self):
+        store = LogStore(self.path)
+        with self.assertRaises(OSError):
+            LogStore(self.path)
+        store.close()
+        store = LogStore(self.path)
+        store.write('a', b'1')
+        store.close()
+
+    def test_truncated_record(self):
+        store = LogStore(self.path)
+        store.write('a', b'1')
+        store.write('b', b'2')
+        store.close()
+        with open(self.path, 'r+b') as f:
+            f.truncate(os.path.getsize(self.path) - 1)
+        store = LogStore(self.path)
+        self.assertEqual(b'1', store.read('a'))
+        self.assertIsNone(store.read('b'))
+        store.write('c', b'3')
+        store.close()
+        store = LogStore(self.path)
+        self.assertEqual(set(['a', 'c']), set(store.keys()))
+
+    def test_compact(self):
+        store = LogStore(self.path, compact_threshold=0)
+        for i in range(0, 100):
+            store.write('a', str(i).encode())
+        store.write('b', b'x')
+        self.assertLess(os.path.getsize(self.path), 100)
+        store.close()
+        store = LogStore(self.path)
+        self.assertEqual(b'99', store.read('a'))
+        self.assertEqual(b'x', store.read('b'))
@@ -0,0 +1,164 @@
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+
+from . import propertycacher
+
+class PropertyCacherTest(unittest.TestCase):
+    def setUp(self):
+        self.saved_path = propertycacher.CACHE_PATH
+        self.dir = tempfile.mkdtemp()
+        propertycacher.CACHE_PATH = self.dir + '/cache/'
+        propertycacher._hashes.clear()
+
+    def tearDown(self):
+        propertycacher.CACHE_PATH = self.saved_path
+        propertycacher.flush()
+        propertycacher._write_behind = None
+        propertycacher.clear_preload()
+        shutil.rmtree(self.dir)
+
+    def test_save_load(self):
+        propertycacher.save('/a/b', 'org.test.A', {'org.test.A': {'x': 1}})
+        props = {'org.test.A': {'x': 0, 'y': 2}}
+        propertycacher.load('/a/b', 'org.test.A', props)
+        self.assertEqual({'org.test.A': {'x': 1}}, props)
+
+    def test_load_keeps_native_types(self):
+        propertycacher.save('/a', 'org.test.A', {'org.test.A': {
+            'x': 1.5, 'y': [1, 2], 'z': 2 ** 40}})
+        props = {'org.test.A': {'x': 0, 'y': ['s'], 'z': 0}}
+        propertycacher.load('/a', 'org.test.A', props)
+        self.assertEqual(
+            {'org.test.A': {'x': 1.5, 'y': [1, 2], 'z': 2 ** 40}}, props)
+        self.assertIs(float, type(props['org.test.A']['x']))
+
+    def test_load_error_keeps_properties(self):
+        propertycacher.save('/a', 'org.test.A', {'org.test.A': {'x': 'a'}})
+        props = {'org.test.A': {'x': 0, 'y': 1}}
+        propertycacher.load('/a', 'org.test.A', props, {'x': 'i'})
+        self.assertEqual({'org.test.A': {'x': 0, 'y': 1}}, props)
+
+    def test_unchanged_not_rewritten(self):
+        props = {'org.test.A': {'x': 1}}
+        propertycacher.save('/a', 'org.test.A', props)
+        filename = propertycacher.getCacheFilename('/a', 'org.test.A')
+        os.utime(filename, (0, 0))
+        propertycacher.save('/a', 'org.test.A', props)
+        self.assertEqual(0, os.stat(filename).st_mtime)
+        props['org.test.A']['x'] = 2
+        propertycacher.save('/a', 'org.test.A', props)
+        self.assertNotEqual(0, os.stat(filename).st_mtime)
+
+    def test_write_behind(self):
+        propertycacher.enable_write_behind(3600)
+        filename = propertycacher.getCacheFilename('/a', 'org.test.A')
+        propertycacher.save('/a', 'org.test.A', {'org.test.A': {'x': 1}})
+        propertycacher.save('/a', 'org.test.A', {'org.test.A': {'x': 2}})
+        self.assertFalse(os.path.exists(filename))
+        propertycacher.flush()
+        props = {'org.test.A': {}}
+        propertycacher.load('/a', 'org.test.A', props)
+        self.assertEqual({'org.test.A': {'x': 2}}, props)
+
+    def test_concurrent_flush_last_writer_wins(self):
+        propertycacher.enable_write_behind(3600)
+        write_data = propertycacher._write_data
+        writing = threading.Event()
+        release = threading.Event()
+
+        def slow_write_data(filename, data):
+            if not writing.is_set():
+                writing.set()
+                release.wait(5)
+            write_data(filename, data)
+
+        propertycacher._write_data = slow_write_data
+        try:
+            propertycacher.save('/a', 'org.test.A', {'org.test.A': {'x': 1}})
+            first = threading.Thread(target=propertycacher.flush)
+            first.start()
+            writing.wait(5)
+            propertycacher.save('/a', 'org.test.A', {'org.test.A': {'x': 2}})
+            second = threading.Thread(target=propertycacher.flush)
+            second.start()
+            second.join(0.1)
+            release.set()
+            first.join()
+            second.join()
+        finally:
+            propertycacher._write_data = write_data
+
+        props = {'org.test.A': {}}
+        propertycacher.load('/a', 'org.test.A', props)
+        self.assertEqual({'org.test.A': {'x': 2}}, props)
+
+    def test_load_flushes_pending(self):
+        propertycacher.enable_write_behind(3600)
+        propertycacher.save('/a', 'org.test.A', {'org.test.A': {'x': 1}})
+        props = {'org.test.A': {}}
+        propertycacher.load('/a', 'org.test.A', props)
+        self.assertEqual({'org.test.A': {'x': 1}}, props)
+
+    def test_log_store_migration(self):
+        propertycacher.save('/a', 'org.test.A', {'org.test.A': {'x': 1}})
+        propertycacher.save('/c', 'org.test.A', {'org.test.A': {'x': 3}})
+        filename = propertycacher.getCacheFilename('/a', 'org.test.A')
+        other = propertycacher.getCacheFilename('/c', 'org.test.A')
+        store = propertycacher.use_log_store(
+            propertycacher.CACHE_PATH + 'test.log', migrate_prefix='/a')
+        try:
+            self.assertFalse(os.path.exists(filename))
+            self.assertTrue(os.path.exists(other))
+            props = {'org.test.A': {}}
+            propertycacher.load('/a', 'org.test.A', props)
+            self.assertEqual({'org.test.A': {'x': 1}}, props)
+            propertycacher.save('/b', 'org.test.B', {'org.test.B': {'y': 2}})
+            props = {'org.test.B': {}}
+            propertycacher.load('/b', 'org.test.B', props)
+            self.assertEqual({'org.test.B': {'y': 2}}, props)
+        finally:
+            store.close()
+            propertycacher._store = None
+
+    def test_preload(self):
+        propertycacher.save('/a/b', 'org.test.A', {'org.test.A': {'x': 1}})
+        propertycacher.save('/a/c', 'org.test.A', {'org.test.A': {'x': 2}})
+        propertycacher.save('/b', 'org.test.A', {'org.test.A': {'x': 3}})
+        self.assertEqual(2, propertycacher.preload('/a'))
+        shutil.rmtree(propertycacher.CACHE_PATH)
+
+        props = {'org.test.A': {}}
+        propertycacher.load('/a/c', 'org.test.A', props)
+        self.assertEqual({'org.test.A': {'x': 2}}, props)
+        props = {'org.test.A': {'x': 0}}
+        propertycacher.load('/a/d', 'org.test.A', props)
+        self.assertEqual({'org.test.A': {'x': 0}}, props)
+
+        propertycacher.save('/a/b', 'org.test.A', {'org.test.A': {'x': 4}})
+        props = {'org.test.A': {}}
+        propertycacher.load('/a/b', 'org.test.A', props)
+        self.assertEqual({'org.test.A': {'x': 4}}, props)
+
+    def test_preload_flushes_pending(self):
+        propertycacher.enable_write_behind(3600)
+        propertycacher.save('/a/x', 'org.test.A', {'org.test.A': {'v': 1}})
+        self.assertEqual(1, propertycacher.preload('/a'))
+        props = {'org.test.A': {'v': 0}}
+        propertycacher.load('/a/x', 'org.test.A', props)
+        self.assertEqual({'org.test.A': {'v': 1}}, props)
+
+    def test_binary_codec(self):
+        propertycacher.save('/a', 'org.test.A', {'org.test.A': {'x': 1}})
+        propertycacher.set_codec('binary')
+        try:
+            propertycacher.save('/b', 'org.test.A', {'org.test.A': {'x': 2}})
+            for path, x in (('/a', 1), ('/b', 2)):
+                props = {'org.test.A': {}}
+                propertycacher.load(path, 'org.test.A', props)
+                self.assertEqual({'org.test.A': {'x': x}}, props)
+                self.assertIs(int, type(props['org.test.A']['x']))
+        finally:
+            propertycacher.set_codec('pickle')
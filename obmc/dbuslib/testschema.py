@@ -0,0 +1,64 @@
+import unittest
+
+try:
+    import dbus
+    from .schema import Schema
+except ImportError:  # dbus-python is not installed
+    Schema = None
+
+SPEC = {
+    'org.test.A': {
+        'x': {'signature': 'y', 'max': 100},
+        'y': {'type': str, 'enum': ['on', 'off']},
+        'z': {'signature': 'a{sas}'},
+        'r': {'readonly': True},
+        'm': {'min': 0, 'enum': [0, 1]},
+    },
+}
+
+@unittest.skipIf(Schema is None, 'dbus-python is not available')
+class SchemaTest(unittest.TestCase):
+    def setUp(self):
+        self.schema = Schema(SPEC)
+
+    def test_valid(self):
+        self.schema.validate('org.test.A', 'x', 10)
+        self.schema.validate('org.test.A', 'y', 'on')
+        self.schema.validate('org.test.A', 'z', {'a': ['b', 'c']})
+        self.schema.validate('org.test.A', 'unknown', object())
+        self.schema.validate('org.test.B', 'x', object())
+
+    def test_signature_range(self):
+        with self.assertRaises(dbus.exceptions.DBusException):
+            self.schema.validate('org.test.A', 'x', -1)
+
+    def test_max(self):
+        with self.assertRaises(dbus.exceptions.DBusException):
+            self.schema.validate('org.test.A', 'x', 101)
+
+    def test_enum(self):
+        with self.assertRaises(dbus.exceptions.DBusException):
+            self.schema.validate('org.test.A', 'y', 'maybe')
+
+    def test_wrong_type_without_signature(self):
+        self.schema.validate('org.test.A', 'm', 1)
+        for value in ('1', None, [1]):
+            with self.assertRaises(dbus.exceptions.DBusException) as cm:
+                self.schema.validate('org.test.A', 'm', value)
+            self.assertEqual(
+                'org.freedesktop.DBus.Error.InvalidArgs',
+                cm.exception.get_dbus_name())
+
+    def test_container(self):
+        with self.assertRaises(dbus.exceptions.DBusException):
+            self.schema.validate('org.test.A', 'z', {'a': [1]})
+
+    def test_readonly(self):
+        self.schema.validate('org.test.A', 'r', 1)
+        with self.assertRaises(dbus.exceptions.DBusException):
+            self.schema.validate('org.test.A', 'r', 1, remote=True)
+
+    def test_validate_many(self):
+        self.schema.validate_many('org.test.A', {'x': 1, 'y': 'off'})
+        with self.assertRaises(dbus.exceptions.DBusException):
+            self.schema.validate_many('org.test.A', {'x': 1, 'y': 'no'})
@@ -0,0 +1,136 @@
+import unittest
+
+from .signalpolicy import SignalPolicy, EMIT, SUPPRESS, DEFER, monotonic
+
+try:
+    import dbus
+    from gi.repository import GLib
+    from .bindings import DbusProperties
+except ImportError:  # dbus-python or PyGObject is not installed
+    DbusProperties = None
+
+class SignalPolicyTest(unittest.TestCase):
+    def test_first_change_emits(self):
+        p = SignalPolicy(deadband=10, min_interval=10)
+        self.assertEqual((EMIT, None), p.check(None, 1, 0))
+
+    def test_deadband(self):
+        p = SignalPolicy(deadband=0.5)
+        self.assertEqual(SUPPRESS, p.check((10, 0), 10.5, 1)[0])
+        self.assertEqual(EMIT, p.check((10, 0), 10.6, 1)[0])
+
+    def test_deadband_percent(self):
+        p = SignalPolicy(deadband_percent=10)
+        self.assertEqual(SUPPRESS, p.check((200, 0), 190, 1)[0])
+        self.assertEqual(EMIT, p.check((200, 0), 179, 1)[0])
+
+    def test_deadband_non_numeric(self):
+        p = SignalPolicy(deadband=100)
+        self.assertEqual(EMIT, p.check(('a', 0), 'b', 1)[0])
+
+    def test_deadband_boolean(self):
+        p = SignalPolicy(deadband=1)
+        self.assertEqual(EMIT, p.check((True, 0), False, 1)[0])
+        self.assertEqual(EMIT, p.check((0, 0), True, 1)[0])
+
+    def test_min_interval(self):
+        p = SignalPolicy(min_interval=2)
+        self.assertEqual((DEFER, 1), p.check((1, 10), 2, 11))
+        self.assertEqual(EMIT, p.check((1, 10), 2, 12)[0])
+        p = SignalPolicy(min_interval=2, max_rate=4)
+        self.assertEqual((DEFER, 1.5), p.check((1, 10), 2, 10.5))
+
+    def test_max_rate(self):
+        p = SignalPolicy(max_rate=4)
+        action, delay = p.check((1, 10), 2, 10.05)
+        self.assertEqual(DEFER, action)
+        self.assertAlmostEqual(0.2, delay)
+        self.assertEqual(EMIT, p.check((1, 10), 2, 10.25)[0])
+
+
+@unittest.skipIf(DbusProperties is None, 'dbus-python is not available')
+class DbusPropertiesPolicyTest(unittest.TestCase):
+    def setUp(self):
+        self.obj = DbusProperties()
+        self.obj.unmask_signals()
+        self.signals = []
+        self.obj.PropertiesChanged = \
+            lambda i, c, x: self.signals.append((i, dict(c)))
+
+    def tearDown(self):
+        self.obj.mask_signals()
+
+    def test_interface_policy(self):
+        self.obj.set_signal_policy('org.test.A', SignalPolicy(deadband=1))
+        self.obj.Set('org.test.A', 'x', 10)
+        self.obj.Set('org.test.A', 'x', 11)
+        self.obj.Set('org.test.A', 'x', 12)
+        self.assertEqual(
+            [('org.test.A', {'x': 10}), ('org.test.A', {'x': 12})],
+            self.signals)
+        self.assertEqual(
+            {'emitted': 2, 'suppressed': 1}, self.obj.signal_counters)
+
+    def test_boolean_not_suppressed(self):
+        self.obj.set_signal_policy('org.test.A', SignalPolicy(deadband=1))
+        self.obj.Set('org.test.A', 'Functional', dbus.Boolean(True))
+        self.obj.Set('org.test.A', 'Functional', dbus.Boolean(False))
+        self.assertEqual(2, len(self.signals))
+        self.assertEqual(0, self.obj.signal_counters['suppressed'])
+
+    def test_property_policy_overrides(self):
+        self.obj.set_signal_policy('org.test.A', SignalPolicy(deadband=100))
+        self.obj.set_signal_policy(
+            'org.test.A', SignalPolicy(deadband=0), 'y')
+        for v in (1, 2):
+            self.obj.Set('org.test.A', 'x', v)
+            self.obj.Set('org.test.A', 'y', v)
+        self.assertEqual(
+            [{'x': 1}, {'y': 1}, {'y': 2}], [x[1] for x in self.signals])
+
+        self.obj.set_signal_policy('org.test.A', None)
+        self.obj.Set('org.test.A', 'x', 3)
+        self.assertEqual({'x': 3}, self.signals[-1][1])
+
+    def test_trailing_edge(self):
+        self.obj.set_signal_policy('org.test.A', SignalPolicy(max_rate=20))
+        for v in range(0, 5):
+            self.obj.Set('org.test.A', 'x', v)
+        self.assertEqual([('org.test.A', {'x': 0})], self.signals)
+
+        context = GLib.MainContext.default()
+        deadline = monotonic() + 5
+        while len(self.signals) < 2 and monotonic() < deadline:
+            context.iteration(True)
+        self.assertEqual(
+            [('org.test.A', {'x': 0}), ('org.test.A', {'x': 4})],
+            self.signals)
+        # 1, 2 and 3 were deferred, then superseded
+        self.assertEqual(
+            {'emitted': 2, 'suppressed': 3}, self.obj.signal_counters)
+        self.assertEqual({}, self.obj._deferred_sources)
+
+    def test_min_interval_emits_last_value(self):
+        self.obj.set_signal_policy(
+            'org.test.A', SignalPolicy(min_interval=0.05))
+        for v in range(0, 3):
+            self.obj.Set('org.test.A', 'x', v)
+        self.assertEqual([('org.test.A', {'x': 0})], self.signals)
+
+        context = GLib.MainContext.default()
+        deadline = monotonic() + 5
+        while len(self.signals) < 2 and monotonic() < deadline:
+            context.iteration(True)
+        self.assertEqual(
+            [('org.test.A', {'x': 0}), ('org.test.A', {'x': 2})],
+            self.signals)
+        self.assertEqual(
+            {'emitted': 2, 'suppressed': 1}, self.obj.signal_counters)
+
+    def test_mask_cancels_deferred(self):
+        self.obj.set_signal_policy('org.test.A', SignalPolicy(max_rate=20))
+        self.obj.Set('org.test.A', 'x', 1)
+        self.obj.Set('org.test.A', 'x', 2)
+        self.obj.mask_signals()
+        self.assertEqual({}, self.obj._deferred_sources)
+        self.assertEqual({}, self.obj._deferred_signals)
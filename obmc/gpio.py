@@ -0,0 +1,181 @@
+# Contributors Listed Below - COPYRIGHT 2016
+# [+] International Business Machines Corp.
+#
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied. See the License for the specific language governing
+# permissions and limitations under the License.
+
+import os
+import select
+from obmc.enums import GPIO_DEV
+
+
+# TODO: openbmc/openbmc#2994 remove python 2 support
+def _pread(fd, n, offset):
+    try:
+        return os.pread(fd, n, offset)
+    except AttributeError:  # python 2
+        os.lseek(fd, offset, os.SEEK_SET)
+        return os.read(fd, n)
+
+
+def _pwrite(fd, data, offset):
+    try:
+        return os.pwrite(fd, data, offset)
+    except AttributeError:  # python 2
+        os.lseek(fd, offset, os.SEEK_SET)
+        return os.write(fd, data)
+
+
+def _write_attr(path, value):
+    with open(path, 'w') as f:
+        f.write(value)
+
+
+class GpioLine(object):
+    ''' A sysfs GPIO line, exported on construction if necessary, with
+    its value file kept open for the lifetime of the object.
+    '''
+
+    def __init__(self, number, root=GPIO_DEV, direction=None, edge=None):
+        self.number = number
+        self.path = os.path.join(root, 'gpio{}'.format(number))
+        if not os.path.isdir(self.path):
+            _write_attr(os.path.join(root, 'export'), str(number))
+        if direction is not None:
+            self.set_direction(direction)
+        if edge is not None:
+            self.set_edge(edge)
+        self.fd = os.open(os.path.join(self.path, 'value'), os.O_RDWR)
+
+    def set_direction(self, direction):
+        _write_attr(os.path.join(self.path, 'direction'), direction)
+
+    def set_edge(self, edge):
+        _write_attr(os.path.join(self.path, 'edge'), edge)
+
+    def fileno(self):
+        return self.fd
+
+    def read(self):
+        return int(_pread(self.fd, 8, 0).strip() or 0)
+
+    def write(self, value):
+        _pwrite(self.fd, b'1' if value else b'0', 0)
+
+    def close(self):
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+
+
+class Gpio(object):
+    ''' A set of sysfs GPIO lines under root, looked up and exported once
+    and read in batches.  Lines configured with an edge can be waited
+    on together with wait().
+    '''
+
+    def __init__(self, root=GPIO_DEV):
+        self.root = root
+        self.lines = {}
+        self.chips = None
+        self.poller = select.poll()
+        self.by_fd = {}
+
+    def _scan_chips(self):
+        chips = {}
+        for name in os.listdir(self.root):
+            if not name.startswith('gpiochip'):
+                continue
+            path = os.path.join(self.root, name)
+            try:
+                with open(os.path.join(path, 'label')) as f:
+                    label = f.read().strip()
+                with open(os.path.join(path, 'base')) as f:
+                    base = int(f.read())
+            except (IOError, OSError, ValueError):
+                continue
+            chips[label] = base
+        return chips
+
+    def lookup(self, chip_label, offset):
+        ''' Return the sysfs GPIO number of line offset on the chip with
+        label chip_label.  The chips are scanned on first use only.
+        '''
+
+        if self.chips is None:
+            self.chips = self._scan_chips()
+        try:
+            return self.chips[chip_label] + offset
+        except KeyError:
+            raise KeyError("Unknown GPIO chip: '{}'".format(chip_label))
+
+    def _watch(self, line, edge):
+        watched = line.fd in self.by_fd
+        if edge != 'none' and not watched:
+            # Read once so only subsequent edges are reported.
+            line.read()
+            self.poller.register(line.fd, select.POLLPRI | select.POLLERR)
+            self.by_fd[line.fd] = line
+        elif edge == 'none' and watched:
+            self.poller.unregister(line.fd)
+            del self.by_fd[line.fd]
+
+    def line(self, number, direction=None, edge=None):
+        ''' Return the line for GPIO number, exporting it on first use.
+        A direction or edge given for a line already in use is applied
+        to it, and the line is added to or removed from the set wait()
+        watches to match the edge.
+        '''
+
+        line = self.lines.get(number)
+        if line is None:
+            line = GpioLine(number, self.root, direction, edge)
+            self.lines[number] = line
+        else:
+            if direction is not None:
+                line.set_direction(direction)
+            if edge is not None:
+                line.set_edge(edge)
+        if edge is not None:
+            self._watch(line, edge)
+        return line
+
+    def read(self, number):
+        return self.line(number).read()
+
+    def read_many(self, numbers):
+        return dict((n, self.line(n).read()) for n in numbers)
+
+    def wait(self, timeout=None):
+        ''' Wait for an edge on any line configured with an edge, for at
+        most timeout seconds (forever if None).  Returns a list of
+        (number, value) tuples for the lines that changed.
+        '''
+
+        if timeout is not None:
+            timeout = int(timeout * 1000)
+        events = self.poller.poll(timeout)
+        changed = []
+        for fd, _ in events:
+            line = self.by_fd.get(fd)
+            if line is not None:
+                changed.append((line.number, line.read()))
+        return changed
+
+    def close(self):
+        for line in self.lines.values():
+            if line.fd in self.by_fd:
+                self.poller.unregister(line.fd)
+            line.close()
+        self.lines = {}
+        self.by_fd = {}
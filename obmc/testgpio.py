@@ -0,0 +1,83 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from .gpio import Gpio, GpioLine
+
+class GpioTest(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        for n in (10, 11):
+            self.make_line(n, '0')
+        chip = os.path.join(self.root, 'gpiochip8')
+        os.mkdir(chip)
+        with open(os.path.join(chip, 'label'), 'w') as f:
+            f.write('1e780000.gpio\n')
+        with open(os.path.join(chip, 'base'), 'w') as f:
+            f.write('8\n')
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def make_line(self, n, value):
+        path = os.path.join(self.root, 'gpio{}'.format(n))
+        if not os.path.isdir(path):
+            os.mkdir(path)
+        with open(os.path.join(path, 'value'), 'w') as f:
+            f.write(value + '\n')
+
+    def test_read_keeps_fd(self):
+        line = GpioLine(10, self.root)
+        self.assertEqual(0, line.read())
+        self.make_line(10, '1')
+        self.assertEqual(1, line.read())
+        line.close()
+
+    def test_write(self):
+        line = GpioLine(10, self.root, direction='out')
+        line.write(1)
+        self.assertEqual(1, line.read())
+        with open(os.path.join(self.root, 'gpio10', 'direction')) as f:
+            self.assertEqual('out', f.read())
+        line.close()
+
+    def test_export(self):
+        with self.assertRaises(OSError):
+            GpioLine(12, self.root)
+        with open(os.path.join(self.root, 'export')) as f:
+            self.assertEqual('12', f.read())
+
+    def test_read_many(self):
+        gpio = Gpio(self.root)
+        self.make_line(11, '1')
+        self.assertEqual({10: 0, 11: 1}, gpio.read_many([10, 11]))
+        self.assertIs(gpio.line(10), gpio.line(10))
+        gpio.close()
+
+    def test_lookup(self):
+        gpio = Gpio(self.root)
+        self.assertEqual(11, gpio.lookup('1e780000.gpio', 3))
+        with self.assertRaises(KeyError):
+            gpio.lookup('nope', 0)
+
+    def test_wait_timeout(self):
+        gpio = Gpio(self.root)
+        gpio.line(10, edge='both')
+        self.assertEqual([], gpio.wait(0))
+        gpio.close()
+
+    def test_line_reconfigures_cached(self):
+        gpio = Gpio(self.root)
+        line = gpio.line(10)
+        self.assertEqual({}, gpio.by_fd)
+        self.assertIs(line, gpio.line(10, direction='in', edge='rising'))
+        path = os.path.join(self.root, 'gpio10')
+        with open(os.path.join(path, 'direction')) as f:
+            self.assertEqual('in', f.read())
+        with open(os.path.join(path, 'edge')) as f:
+            self.assertEqual('rising', f.read())
+        self.assertIs(line, gpio.by_fd[line.fd])
+        gpio.line(10, edge='none')
+        self.assertEqual({}, gpio.by_fd)
+        gpio.close()
@@ -14,61 +14,161 @@
 # implied. See the License for the specific language governing
 # permissions and limitations under the License.
 
+import re
+# TODO: openbmc/openbmc#2994 remove python 2 support
+try:  # python 2
+    STRING_TYPES = (basestring,)
+except NameError:  # python 3
+    STRING_TYPES = (str,)
 
-def dts_encode(obj, fd, **kw):
-    ''' A rudimentary python to dts encoder.
+
+def _encode_value(obj, context=''):
+    if isinstance(obj, STRING_TYPES):
+        return "\"%s\"" % obj.replace('\\', '\\\\').replace('"', '\\"')
+    if isinstance(obj, int):
+        if context == 'int_list':
+            return "%d" % obj
+        return "<%d>" % obj
+    if isinstance(obj, list):
+        if all((type(x) is int) for x in obj):
+            return '<%s>' % ' '.join(
+                [_encode_value(x, 'int_list') for x in obj])
+        return ','.join([_encode_value(x) for x in obj])
+    return ''
+
+
+def dts_dumps(obj, indent=0, depth=0):
+    ''' Encode a dict as a dts fragment, returning it as a string.
+
+    Properties with the string value 'true' are encoded as boolean
+    properties, 'false' properties are omitted, and dict values become
+    child nodes.  Nodes are encoded iteratively, so the depth of obj is
+    not limited by the recursion limit.  Any other obj is encoded as a
+    property value.
     '''
-    indent = kw.get('indent', 0)
-    depth = kw.setdefault('depth', 0)
-    tab = indent * depth * ' '
-    kw['depth'] += 1
+
+    if not isinstance(obj, dict):
+        return _encode_value(obj)
+
     newline = '\n' if indent else ' '
-    context = kw.get('context')
+    out = []
+    # A stack of (node, depth) to encode, and closing braces to emit.
+    stack = [(obj, depth)]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, STRING_TYPES):
+            out.append(item)
+            continue
 
-    if(isinstance(obj, dict)):
+        node, depth = item
+        tab = indent * depth * ' '
         nodes = []
-        for k, v in obj.iteritems():
-            if(isinstance(v, dict)):
+        for k, v in node.items():
+            if isinstance(v, dict):
                 nodes.append((k, v))
                 continue
-            if(isinstance(v, basestring) and v.lower() == 'true'):
-                fd.write('%s%s' % (tab, k))
-            elif(isinstance(v, basestring) and v.lower() == 'false'):
+            if isinstance(v, STRING_TYPES) and v.lower() == 'true':
+                out.append('%s%s;%s' % (tab, k, newline))
+            elif isinstance(v, STRING_TYPES) and v.lower() == 'false':
                 continue
             else:
-                fd.write('%s%s = ' % (tab, k))
-                dts_encode(v, fd, **kw)
-            fd.write(";%s" % newline)
+                out.append('%s%s = %s;%s' % (
+                    tab, k, _encode_value(v), newline))
 
-        for k, v in nodes:
-            fd.write('%s%s {%s' % (tab, k, newline))
-            dts_encode(v, fd, **kw)
-            fd.write('%s};%s' % (tab, newline))
+        for k, v in reversed(nodes):
+            stack.append('%s};%s' % (tab, newline))
+            stack.append((v, depth + 1))
+            stack.append('%s%s {%s' % (tab, k, newline))
 
-    if(isinstance(obj, int)):
-        if context == 'int_list':
-            fd.write("%d" % obj)
-        else:
-            fd.write("<%d>" % obj)
+    return ''.join(out)
 
-    if(isinstance(obj, basestring)):
-        fd.write("\"%s\"" % obj)
 
-    if(isinstance(obj, list)):
-        ctx = 'int_list' if all((type(x) is int) for x in iter(obj)) else ''
-        if ctx is 'int_list':
-            delim = ' '
-            closure = ('<', '>')
-        else:
-            delim = ','
-            closure = ('', '')
+def dts_encode(obj, fd, **kw):
+    ''' A rudimentary python to dts encoder.  The fragment is built in
+    memory and written to fd with a single write.
+    '''
+    fd.write(dts_dumps(obj, kw.get('indent', 0), kw.get('depth', 0)))
 
-        fd.write(closure[0])
-        if obj:
-            for v in obj[:-1]:
-                dts_encode(v, fd, context=ctx, **kw)
-                fd.write(delim)
 
-            dts_encode(obj[-1], fd, context=ctx)
+_dts_token = re.compile(r'''
+    (?P<skip>\s+|//[^\n]*|/\*.*?\*/)
+    |(?P<string>"(?:[^"\\]|\\.)*")
+    |(?P<cells><[^>]*>)
+    |(?P<punct>[=;{},])
+    |(?P<name>[^\s=;{},"<>]+)
+''', re.VERBOSE | re.DOTALL)
+
+_dts_escape = re.compile(r'\\(.)')
+
+
+def _dts_tokens(s):
+    pos = 0
+    end = len(s)
+    match = _dts_token.match
+    while pos < end:
+        m = match(s, pos)
+        if m is None:
+            raise ValueError("Invalid dts at offset {}".format(pos))
+        pos = m.end()
+        kind = m.lastgroup
+        if kind != 'skip':
+            yield kind, m.group(kind)
+
+
+def _dts_value(kind, token):
+    if kind == 'string':
+        return _dts_escape.sub(r'\1', token[1:-1])
+    if kind == 'cells':
+        cells = [int(x, 0) for x in token[1:-1].split()]
+        return cells[0] if len(cells) == 1 else cells
+    raise ValueError("Unexpected token: '{}'".format(token))
+
+
+def dts_loads(s):
+    ''' Decode a dts fragment, as produced by dts_dumps, into a dict.
+
+    Boolean properties decode to 'true'.  A single cell decodes to an
+    int and a single string to a string, so one element lists do not
+    survive a round trip.
+    '''
+
+    root = {}
+    stack = [root]
+    tokens = _dts_tokens(s)
+    for kind, token in tokens:
+        if kind == 'punct' and token == '}':
+            if len(stack) == 1:
+                raise ValueError("Unbalanced '}'")
+            stack.pop()
+            kind, token = next(tokens, (None, None))
+            if token != ';':
+                raise ValueError("Expected ';' after '}'")
+            continue
+        if kind != 'name':
+            raise ValueError("Unexpected token: '{}'".format(token))
+
+        name = token
+        kind, token = next(tokens, (None, None))
+        if token == ';':
+            stack[-1][name] = 'true'
+        elif token == '{':
+            child = stack[-1].setdefault(name, {})
+            stack.append(child)
+        elif token == '=':
+            values = []
+            while True:
+                kind, token = next(tokens, (None, None))
+                values.append(_dts_value(kind, token))
+                kind, token = next(tokens, (None, None))
+                if token == ';':
+                    break
+                if token != ',':
+                    raise ValueError("Expected ',' or ';'")
+            stack[-1][name] = values[0] if len(values) == 1 else values
+        else:
+            raise ValueError("Unexpected token after '{}'".format(name))
+
+    if len(stack) != 1:
+        raise ValueError("Unterminated node")
 
-        fd.write(closure[1])
+    return root
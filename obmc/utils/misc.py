@@ -30,8 +30,69 @@ def org_dot_openbmc_match(name, sep='.', prefix=''):
         [x in name or name in x for x in names])
 
 
+class CaseInsensitiveIndex(object):
+    ''' A case-folded index over a collection of names.
+
+    Build the index once and update it incrementally as names come and
+    go, rather than lower-casing every element of a list on each lookup.
+    As with find_case_insensitive, the first name added for a given
+    folded key wins.  Every spelling is remembered, so discarding the
+    winner exposes the next one added; discard removes only the exact
+    spelling given.
+    '''
+
+    def __init__(self, iterable=()):
+        self.index = {}
+        # The spellings of each folded key, in the order added.
+        self.spellings = {}
+        self.update(iterable)
+
+    def add(self, value):
+        key = value.lower()
+        spellings = self.spellings.setdefault(key, [])
+        if value not in spellings:
+            spellings.append(value)
+        self.index.setdefault(key, value)
+
+    def discard(self, value):
+        key = value.lower()
+        spellings = self.spellings.get(key)
+        if not spellings or value not in spellings:
+            return
+        spellings.remove(value)
+        if spellings:
+            self.index[key] = spellings[0]
+        else:
+            del self.spellings[key]
+            del self.index[key]
+
+    def update(self, iterable):
+        for x in iterable:
+            self.add(x)
+
+    def get(self, value, default=None):
+        return self.index.get(value.lower(), default)
+
+    def resolve(self, values, default=None):
+        index = self.index
+        return [index.get(x.lower(), default) for x in values]
+
+    def __contains__(self, value):
+        return value.lower() in self.index
+
+    def __iter__(self):
+        return iter(self.index.values())
+
+    def __len__(self):
+        return len(self.index)
+
+
 def find_case_insensitive(value, lst):
-    return next((x for x in lst if x.lower() == value.lower()), None)
+    if isinstance(lst, CaseInsensitiveIndex):
+        return lst.get(value)
+    # A one-off lookup: scan with early exit rather than indexing lst.
+    value = value.lower()
+    return next((x for x in lst if x.lower() == value), None)
 
 
 def makelist(data):
@@ -15,6 +15,9 @@
 # permissions and limitations under the License.
 
 
+from obmc.utils import tracing
+
+
 class PathTreeItemIterator(object):
     def __init__(self, path_tree, subtree, depth):
         self.path_tree = path_tree
@@ -95,6 +98,10 @@ class PathTree:
     def __init__(self):
         self.root = {}
         self.cache = {}
+        # Incremented on every insertion, deletion and demotion, and by
+        # touch(); a cheap signal that the tree's contents may have
+        # changed.
+        self.version = 0
 
     def _try_delete_parent(self, elements):
         if len(elements) == 1:
@@ -131,8 +138,10 @@ class PathTree:
                 return False
         return True
 
+    @tracing.traced('PathTree.__delitem__', 'pathtree')
     def __delitem__(self, key):
         del self.cache[key]
+        self.version += 1
         kids = 'children'
         elements = ['/'] + list(filter(bool, key.split('/')))
         d = self.root
@@ -145,8 +154,10 @@ class PathTree:
         del d[elements[-1]]
         self._try_delete_parent(elements)
 
+    @tracing.traced('PathTree.__setitem__', 'pathtree')
     def __setitem__(self, key, value):
         self.cache[key] = value
+        self.version += 1
         kids = 'children'
         elements = ['/'] + list(filter(bool, key.split('/')))
         d = self.root
@@ -179,7 +190,16 @@ class PathTree:
     def get_children(self, key):
         return [x for x in self._get_node(key)['children'].keys()]
 
+    def touch(self):
+        ''' Record that a value was modified in place (e.g.
+        tree['/x']['prop'] = 1), which the tree cannot observe itself.
+        '''
+        self.version += 1
+
+    @tracing.traced('PathTree.demote', 'pathtree')
     def demote(self, key):
+        self.cache.pop(key, None)
+        self.version += 1
         n = self._get_node(key)
         if 'data' in n:
             del n['data']
@@ -193,6 +213,7 @@ class PathTree:
     def items(self, subtree='/', depth=None):
         return [x for x in self.iteritems(subtree, depth)]
 
+    @tracing.traced('PathTree.dataitems', 'pathtree')
     def dataitems(self, subtree='/', depth=None):
         # dataitems() must return an iterable object containing all of the
         # items explicitly inserted into the tree, rooted at subtree with
@@ -228,6 +249,7 @@ class PathTree:
                 return iter({}.items())
         return PathTreeItemIterator(self, subtree, depth)
 
+    @tracing.traced('PathTree.dumpd', 'pathtree')
     def dumpd(self, subtree='/'):
         result = {}
         d = result
@@ -0,0 +1,105 @@
+import io
+import unittest
+
+from .dtree import dts_dumps, dts_encode, dts_loads
+
+class DtsEncodeTest(unittest.TestCase):
+    def test_scalars(self):
+        self.assertEqual(
+            'a = <1>; b = "s"; ', dts_dumps({'a': 1, 'b': 's'}))
+
+    def test_booleans(self):
+        self.assertEqual('a; ', dts_dumps({'a': 'true', 'b': 'False'}))
+
+    def test_int_list(self):
+        self.assertEqual('a = <1 2 3>; ', dts_dumps({'a': [1, 2, 3]}))
+
+    def test_mixed_list(self):
+        self.assertEqual(
+            'a = "x",<1>,<2 3>; ', dts_dumps({'a': ['x', 1, [2, 3]]}))
+
+    def test_nodes_indent(self):
+        self.assertEqual(
+            'a = <1>;\nn {\n  b = <2>;\n};\n',
+            dts_dumps({'n': {'b': 2}, 'a': 1}, indent=2))
+
+    def test_encode_fd(self):
+        fd = io.StringIO()
+        dts_encode({'n': {'b': u'c'}}, fd, indent=1)
+        self.assertEqual(u'n {\n b = "c";\n};\n', fd.getvalue())
+
+    def test_top_level_value(self):
+        self.assertEqual('<1 2>', dts_dumps([1, 2]))
+        self.assertEqual('"s"', dts_dumps('s'))
+        fd = io.StringIO()
+        dts_encode([u'a', 3], fd)
+        self.assertEqual(u'"a",<3>', fd.getvalue())
+
+    def test_deep(self):
+        obj = {}
+        d = obj
+        for i in range(0, 5000):
+            d['n'] = {'v': i}
+            d = d['n']
+        decoded = dts_loads(dts_dumps(obj))
+        for i in range(0, 5000):
+            decoded = decoded['n']
+            self.assertEqual(i, decoded['v'])
+
+
+class DtsDecodeTest(unittest.TestCase):
+    def test_round_trip(self):
+        obj = {
+            'a': 1, 'b': 's', 'c': [1, 2], 'd': ['x', 'y', 3], 'e': 'true',
+            'n': {'p': 5, 'm': {'q': 'z', 'o': {}}},
+        }
+        for indent in (0, 4):
+            self.assertEqual(obj, dts_loads(dts_dumps(obj, indent=indent)))
+
+    def test_comments_and_hex(self):
+        self.assertEqual(
+            {'n': {'reg': [16, 32]}},
+            dts_loads('/* c */ n { // c\n reg = <0x10 0x20>; };'))
+
+    def test_escapes(self):
+        self.assertEqual({'a': 'x"y'}, dts_loads(r'a = "x\"y";'))
+
+    def test_escapes_round_trip(self):
+        obj = {'a': 'x"y', 'b': 'c:\\d', 'c': ['\\"', 'e']}
+        self.assertEqual(r'a = "x\"y";', dts_dumps({'a': 'x"y'}).strip())
+        self.assertEqual(obj, dts_loads(dts_dumps(obj)))
+
+    def test_unbalanced(self):
+        with self.assertRaises(ValueError):
+            dts_loads('n { a = <1>;')
+        with self.assertRaises(ValueError):
+            dts_loads('};')
+
+import timeit
+
+dtree_setup = """\
+from obmc.utils.dtree import dts_dumps, dts_loads
+from obmc.utils.testdtree import make_config
+config = make_config({})
+text = dts_dumps(config, indent=4)
+"""
+
+def make_config(n):
+    config = {}
+    for i in range(0, n):
+        config['inventory{}'.format(i)] = {
+            'compatible': 'ibm,inventory-item',
+            'reg': [i, 0x1000],
+            'present': 'true',
+            'fru': {'name': 'fru{}'.format(i), 'ids': ['a', 'b', i]},
+        }
+    return config
+
+if __name__ == "__main__":
+    print("dts tests (2 nodes per n):")
+    for n in (100, 1000, 5000):
+        setup = dtree_setup.format(n)
+        for name, stmt in (('dumps', 'dts_dumps(config, indent=4)'),
+                           ('loads', 'dts_loads(text)')):
+            time = timeit.timeit(stmt, setup=setup, number=10)
+            print("\t{}: n={}: {}".format(name, n, time / 10))
@@ -0,0 +1,58 @@
+import unittest
+
+from .misc import CaseInsensitiveIndex, find_case_insensitive
+
+class CaseInsensitiveIndexTest(unittest.TestCase):
+    def test_get(self):
+        idx = CaseInsensitiveIndex(['Foo', 'Bar'])
+        self.assertEqual('Foo', idx.get('fOO'))
+        self.assertEqual('Bar', idx.get('BAR'))
+
+    def test_get_missing(self):
+        idx = CaseInsensitiveIndex(['Foo'])
+        self.assertIsNone(idx.get('baz'))
+        self.assertEqual(1, idx.get('baz', 1))
+
+    def test_first_wins(self):
+        idx = CaseInsensitiveIndex(['Foo', 'FOO'])
+        self.assertEqual('Foo', idx.get('foo'))
+        self.assertEqual(1, len(idx))
+
+    def test_add_discard(self):
+        idx = CaseInsensitiveIndex()
+        idx.add('Foo')
+        self.assertIn('FOO', idx)
+        idx.discard('Foo')
+        self.assertNotIn('Foo', idx)
+        self.assertEqual(0, len(idx))
+
+    def test_discard_keeps_other_spellings(self):
+        idx = CaseInsensitiveIndex()
+        idx.add('Foo')
+        idx.add('FOO')
+        idx.discard('foo')
+        self.assertEqual('Foo', idx.get('foo'))
+        idx.discard('Foo')
+        self.assertEqual('FOO', find_case_insensitive('foo', idx))
+        idx.discard('FOO')
+        self.assertNotIn('foo', idx)
+        self.assertEqual({}, idx.spellings)
+
+    def test_resolve(self):
+        idx = CaseInsensitiveIndex(['Foo', 'Bar'])
+        self.assertEqual(
+            ['Bar', None, 'Foo'], idx.resolve(['bar', 'baz', 'foo']))
+
+    def test_find_case_insensitive_list(self):
+        self.assertEqual('Foo', find_case_insensitive('foo', ['Foo', 'FOO']))
+        self.assertIsNone(find_case_insensitive('baz', ['Foo']))
+
+    def test_find_case_insensitive_stops_at_match(self):
+        def names():
+            yield 'Foo'
+            raise AssertionError('scanned past the match')
+        self.assertEqual('Foo', find_case_insensitive('FOO', names()))
+
+    def test_find_case_insensitive_index(self):
+        idx = CaseInsensitiveIndex(['Foo'])
+        self.assertEqual('Foo', find_case_insensitive('FOO', idx))
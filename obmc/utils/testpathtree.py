@@ -183,6 +183,28 @@ class PathTreeTest(unittest.TestCase):
         pt.demote('/a/b')
         self.assertEquals(set([1, None]), set(pt.values()))
 
+    def test_demote_get(self):
+        pt = PathTree()
+        pt['/a'] = 1
+        pt['/a/b'] = 2
+        pt.demote('/a')
+        self.assertEquals(None, pt.get('/a'))
+        self.assertEquals([('/a/b', 2)], list(pt.dataitems()))
+
+    def test_version(self):
+        pt = PathTree()
+        v = pt.version
+        pt['/a'] = 1
+        self.assertNotEqual(v, pt.version)
+        v = pt.version
+        pt['/a'].__class__
+        self.assertEqual(v, pt.version)
+        pt.demote('/a')
+        self.assertNotEqual(v, pt.version)
+        v = pt.version
+        pt.touch()
+        self.assertNotEqual(v, pt.version)
+
     def test_iter(self):
         pt = PathTree()
         pt['/a'] = 1
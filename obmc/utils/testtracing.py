@@ -0,0 +1,184 @@
+import json
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+
+from obmc.utils import tracing
+from obmc.utils.pathtree import PathTree
+
+try:
+    from obmc.dbuslib.introspection import IntrospectionParser
+except ImportError:  # dbus-python is not installed
+    IntrospectionParser = None
+
+INTROSPECT_XML = {
+    '/': '<node><node name="a"/></node>',
+    '/a': '<node><interface name="org.test.A"/></node>',
+}
+
+
+class FakeProxy(object):
+    def __init__(self, path):
+        self.path = path
+
+    def get_dbus_method(self, member, dbus_interface=None):
+        return lambda: INTROSPECT_XML[self.path]
+
+
+class FakeBus(object):
+    def get_object(self, name, path, introspect=True):
+        return FakeProxy(path)
+
+
+class TracingTest(unittest.TestCase):
+    def setUp(self):
+        tracing.reset()
+        tracing.enable(capacity=1024)
+
+    def tearDown(self):
+        tracing.disable()
+        tracing.reset()
+
+    def test_disabled(self):
+        tracing.disable()
+        with tracing.span('a'):
+            pass
+        self.assertEqual([], tracing.events())
+
+    def test_span(self):
+        with tracing.span('a', 'test', path='/x'):
+            with tracing.span('b', 'test'):
+                pass
+        events = tracing.events()
+        self.assertEqual(['b', 'a'], [x['name'] for x in events])
+        b, a = events
+        self.assertEqual('X', a['ph'])
+        self.assertEqual('test', a['cat'])
+        self.assertEqual({'path': '/x'}, a['args'])
+        self.assertNotIn('args', b)
+        self.assertLessEqual(a['ts'], b['ts'])
+        self.assertGreaterEqual(a['ts'] + a['dur'], b['ts'] + b['dur'])
+
+    def test_exception(self):
+        with self.assertRaises(ValueError):
+            with tracing.span('a'):
+                raise ValueError()
+        self.assertEqual(1, len(tracing.events()))
+
+    def test_traced(self):
+        @tracing.traced(category='test')
+        def f(x):
+            return x + 1
+
+        self.assertEqual(2, f(1))
+        self.assertEqual('test', tracing.events()[0]['cat'])
+        self.assertTrue(tracing.events()[0]['name'].endswith('f'))
+
+    def test_ring_buffer(self):
+        tracing.enable(capacity=4)
+        for i in range(0, 10):
+            with tracing.span(str(i)):
+                pass
+        self.assertEqual(
+            ['6', '7', '8', '9'], [x['name'] for x in tracing.events()])
+
+    def test_sampling(self):
+        tracing.enable(rate=0)
+        with tracing.span('a'):
+            with tracing.span('b'):
+                pass
+        self.assertEqual([], tracing.events())
+
+        tracing.enable(rate=0.5)
+        for i in range(0, 200):
+            with tracing.span('a'):
+                with tracing.span('b'):
+                    pass
+        names = [x['name'] for x in tracing.events()]
+        # children are recorded with their root, never alone
+        self.assertEqual(names.count('a'), names.count('b'))
+        self.assertTrue(0 < names.count('a') < 200)
+
+    def test_threads(self):
+        def worker():
+            with tracing.span('w'):
+                pass
+
+        t = threading.Thread(target=worker)
+        t.start()
+        t.join()
+        with tracing.span('m'):
+            pass
+        tids = set(x['tid'] for x in tracing.events())
+        self.assertEqual(2, len(tids))
+
+    def test_pathtree(self):
+        pt = PathTree()
+        pt['/a/b'] = 1
+        del pt['/a/b']
+        self.assertEqual(
+            ['PathTree.__setitem__', 'PathTree.__delitem__'],
+            [x['name'] for x in tracing.events()])
+
+    def test_dump(self):
+        with tracing.span('a', path='/x'):
+            pass
+        tmpdir = tempfile.mkdtemp()
+        try:
+            filename = os.path.join(tmpdir, 'trace.json')
+            tracing.dump(filename)
+            with open(filename) as f:
+                trace = json.load(f)
+        finally:
+            shutil.rmtree(tmpdir)
+        self.assertEqual('a', trace['traceEvents'][0]['name'])
+
+
+@unittest.skipIf(IntrospectionParser is None, 'dbus-python is not available')
+class TracedIntrospectionTest(unittest.TestCase):
+    def setUp(self):
+        tracing.reset()
+
+    def tearDown(self):
+        tracing.disable()
+        tracing.reset()
+
+    def introspect(self):
+        return IntrospectionParser('org.test', FakeBus()).introspect()
+
+    def test_disabled(self):
+        self.assertEqual(
+            {'/a': {'interfaces': ['org.test.A']}}, self.introspect())
+        self.assertEqual([], tracing.events())
+
+    def test_enabled(self):
+        tracing.enable()
+        self.assertEqual(
+            {'/a': {'interfaces': ['org.test.A']}}, self.introspect())
+        events = tracing.events()
+        spans = [x for x in events if x['name'] == 'Introspect']
+        self.assertEqual(
+            ['/', '/a'], sorted(x['args']['path'] for x in spans))
+        self.assertEqual('org.test', spans[0]['args']['bus_name'])
+        self.assertIn(
+            'IntrospectionParser.introspect', [x['name'] for x in events])
+
+
+if __name__ == '__main__':
+    import timeit
+
+    setup = """\
+from obmc.utils import tracing
+from obmc.utils.pathtree import PathTree
+pt = PathTree()
+"""
+    stmt = "pt['/a/b/c/d'] = 1"
+    for label, extra in (
+            ('disabled', ''),
+            ('enabled', 'tracing.enable()'),
+            ('sampled 1%', 'tracing.enable(rate=0.01)')):
+        t = timeit.timeit(stmt, setup=setup + extra, number=100000)
+        print('PathTree.__setitem__, tracing {}: {:.3f} us'.format(
+            label, t / 100000 * 1e6))
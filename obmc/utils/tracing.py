@@ -0,0 +1,179 @@
+# Contributors Listed Below - COPYRIGHT 2016
+# [+] International Business Machines Corp.
+#
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied. See the License for the specific language governing
+# permissions and limitations under the License.
+
+import collections
+import functools
+import json
+import os
+import random
+import threading
+# TODO: openbmc/openbmc#2994 remove python 2 support
+try:
+    from time import perf_counter as _clock
+except ImportError:
+    from time import time as _clock
+
+# Checked before doing any work, so a span costs a global lookup and a
+# function call when tracing is disabled.
+enabled = False
+# The fraction of root spans recorded.  Spans opened inside a root span
+# follow its sampling decision, so recorded traces are never partial.
+sample_rate = 1.0
+
+_lock = threading.Lock()
+_events = collections.deque(maxlen=65536)
+_epoch = _clock()
+
+
+class _ThreadState(threading.local):
+    depth = 0
+    sampled = False
+
+
+_state = _ThreadState()
+
+
+def enable(capacity=None, rate=1.0):
+    ''' Start recording spans, keeping at most the capacity most recent
+    and sampling rate of root spans.
+    '''
+
+    global enabled, sample_rate, _events
+    with _lock:
+        if capacity is not None and capacity != _events.maxlen:
+            _events = collections.deque(_events, maxlen=capacity)
+    sample_rate = rate
+    enabled = True
+
+
+def disable():
+    global enabled
+    enabled = False
+
+
+def reset():
+    with _lock:
+        _events.clear()
+
+
+def _record(name, category, start, end, args):
+    event = (name, category, start, end - start,
+             threading.current_thread().ident, args)
+    with _lock:
+        _events.append(event)
+
+
+class _Span(object):
+    __slots__ = ('name', 'category', 'args', 'start')
+
+    def __init__(self, name, category, args):
+        self.name = name
+        self.category = category
+        self.args = args
+        self.start = None
+
+    def __enter__(self):
+        state = _state
+        if not state.depth:
+            state.sampled = random.random() < sample_rate
+        state.depth += 1
+        if state.sampled:
+            self.start = _clock()
+        return self
+
+    def __exit__(self, *exc):
+        _state.depth -= 1
+        if self.start is not None:
+            _record(self.name, self.category, self.start, _clock(), self.args)
+        return False
+
+
+class _NullSpan(object):
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_null_span = _NullSpan()
+
+
+def span(name, category='', **args):
+    ''' A context manager recording its block as a span named name. '''
+
+    if not enabled:
+        return _null_span
+    return _Span(name, category, args or None)
+
+
+def traced(name=None, category=''):
+    ''' A decorator recording each call of the decorated function as a
+    span, named after the function by default.
+    '''
+
+    def decorator(func):
+        label = name or getattr(func, '__qualname__', func.__name__)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not enabled:
+                return func(*args, **kwargs)
+            with _Span(label, category, None):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def events():
+    ''' Returns the recorded spans, oldest first, as Chrome trace-event
+    complete ('X') events with timestamps in microseconds.
+    '''
+
+    with _lock:
+        recorded = list(_events)
+
+    pid = os.getpid()
+    result = []
+    for name, category, start, duration, tid, args in recorded:
+        event = {
+            'name': name,
+            'cat': category,
+            'ph': 'X',
+            'ts': (start - _epoch) * 1e6,
+            'dur': duration * 1e6,
+            'pid': pid,
+            'tid': tid,
+        }
+        if args:
+            event['args'] = args
+        result.append(event)
+    return result
+
+
+def export():
+    ''' Returns the recorded spans in the Chrome trace-event JSON object
+    format, loadable by chrome://tracing and Perfetto.
+    '''
+
+    return {'traceEvents': events(), 'displayTimeUnit': 'ms'}
+
+
+def dump(filename):
+    with open(filename, 'w') as f:
+        json.dump(export(), f, default=str)
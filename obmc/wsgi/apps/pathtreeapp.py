@@ -0,0 +1,161 @@
+# Contributors Listed Below - COPYRIGHT 2016
+# [+] International Business Machines Corp.
+#
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied. See the License for the specific language governing
+# permissions and limitations under the License.
+
+import itertools
+import json
+# TODO: openbmc/openbmc#2994 remove python 2 support
+try:  # python 2
+    from urlparse import parse_qs
+except ImportError:  # python 3
+    from urllib.parse import parse_qs
+
+STATUS_TEXT = {
+    200: '200 OK',
+    400: '400 Bad Request',
+    404: '404 Not Found',
+    405: '405 Method Not Allowed',
+}
+
+
+class HTTPError(Exception):
+    def __init__(self, status, description):
+        super(HTTPError, self).__init__(description)
+        self.status = status
+        self.description = description
+
+
+class PathTreeApp(object):
+    ''' A WSGI application serving the contents of a PathTree:
+
+    GET /path/list       -- the paths of the objects below /path
+    GET /path/enumerate  -- the objects below /path, keyed by path
+    GET /path            -- the object at /path
+
+    list and enumerate accept depth, offset and limit query parameters.
+    Their responses are generated incrementally and yielded in chunks
+    of about chunk_size bytes, so large subtrees are never held in
+    memory as one string.  The tree must not be modified while a
+    response is being iterated.
+    '''
+
+    def __init__(self, tree, chunk_size=16384):
+        self.tree = tree
+        self.chunk_size = chunk_size
+
+    @staticmethod
+    def _int_param(query, name):
+        value = query.get(name)
+        if value is None:
+            return None
+        raw = value[-1]
+        try:
+            value = int(raw)
+        except ValueError:
+            value = -1
+        if value < 0:
+            raise HTTPError(
+                400, "Invalid value for '{}': '{}'".format(name, raw))
+        return value
+
+    def _items(self, path, query):
+        depth = self._int_param(query, 'depth')
+        offset = self._int_param(query, 'offset') or 0
+        limit = self._int_param(query, 'limit')
+
+        try:
+            data = self.tree.get(path)
+            items = self.tree.dataitems(path, depth)
+        except KeyError:
+            raise HTTPError(404, "Not found: '{}'".format(path))
+
+        if path != '/' and data is not None:
+            items = itertools.chain([(path, data)], items)
+        stop = None if limit is None else offset + limit
+        return itertools.islice(items, offset, stop)
+
+    def _chunks(self, fragments):
+        buf = []
+        size = 0
+        for fragment in fragments:
+            buf.append(fragment)
+            size += len(fragment)
+            if size >= self.chunk_size:
+                yield ''.join(buf).encode('utf-8')
+                buf = []
+                size = 0
+        if buf:
+            yield ''.join(buf).encode('utf-8')
+
+    @staticmethod
+    def _envelope(fragments, status=200):
+        yield '{"data": '
+        for fragment in fragments:
+            yield fragment
+        yield ', "message": {}, "status": {}}}'.format(
+            json.dumps(STATUS_TEXT[status]),
+            json.dumps('ok' if status == 200 else 'error'))
+
+    @staticmethod
+    def _list(items):
+        yield '['
+        for i, (k, v) in enumerate(items):
+            yield (', ' if i else '') + json.dumps(k)
+        yield ']'
+
+    @staticmethod
+    def _enumerate(items):
+        dumps = json.dumps
+        yield '{'
+        for i, (k, v) in enumerate(items):
+            yield (', ' if i else '') + dumps(k) + ': ' + dumps(v)
+        yield '}'
+
+    def _route(self, environ):
+        if environ.get('REQUEST_METHOD', 'GET') not in ('GET', 'HEAD'):
+            raise HTTPError(405, 'Method not allowed')
+
+        path = environ.get('PATH_INFO') or '/'
+        query = parse_qs(environ.get('QUERY_STRING', ''))
+        elements = [x for x in path.split('/') if x]
+        action = elements[-1] if elements else None
+        if action in ('list', 'enumerate'):
+            path = '/' + '/'.join(elements[:-1])
+            items = self._items(path, query)
+            if action == 'list':
+                return self._list(items)
+            return self._enumerate(items)
+
+        path = '/' + '/'.join(elements)
+        data = self.tree.get(path)
+        if data is None:
+            raise HTTPError(404, "Not found: '{}'".format(path))
+        return iter([json.dumps(data)])
+
+    def __call__(self, environ, start_response):
+        try:
+            # Resolve the route, and with it any error, before starting
+            # the response; serialization itself is deferred.
+            fragments = self._route(environ)
+            status = 200
+        except HTTPError as e:
+            fragments = iter([json.dumps({'description': e.description})])
+            status = e.status
+
+        start_response(STATUS_TEXT[status], [
+            ('Content-Type', 'application/json')])
+        if environ.get('REQUEST_METHOD') == 'HEAD':
+            return []
+        return self._chunks(self._envelope(fragments, status))
@@ -0,0 +1,88 @@
+import json
+import unittest
+from wsgiref.util import setup_testing_defaults
+from wsgiref.validate import validator
+
+from obmc.utils.pathtree import PathTree
+from .pathtreeapp import PathTreeApp
+
+class PathTreeAppTest(unittest.TestCase):
+    def setUp(self):
+        self.tree = PathTree()
+        self.tree['/a'] = {'x': 1}
+        self.tree['/a/b'] = {'x': 2}
+        self.tree['/a/b/c'] = {'x': 3}
+        self.tree['/d'] = {'x': 4}
+
+    def request(self, path, query='', app=None):
+        environ = {
+            'PATH_INFO': path, 'QUERY_STRING': query, 'SCRIPT_NAME': ''}
+        setup_testing_defaults(environ)
+        result = {}
+
+        def start_response(status, headers, exc_info=None):
+            result['status'] = status
+            result['headers'] = headers
+
+        app = validator(app or PathTreeApp(self.tree))
+        body_iter = app(environ, start_response)
+        try:
+            body = b''.join(body_iter)
+        finally:
+            body_iter.close()
+        return result['status'], json.loads(body.decode('utf-8'))
+
+    def test_get(self):
+        status, body = self.request('/a/b')
+        self.assertEqual('200 OK', status)
+        self.assertEqual({'x': 2}, body['data'])
+        self.assertEqual('ok', body['status'])
+
+    def test_get_missing(self):
+        status, body = self.request('/nope')
+        self.assertEqual('404 Not Found', status)
+        self.assertEqual('error', body['status'])
+
+    def test_list_root(self):
+        status, body = self.request('/list')
+        self.assertEqual(
+            set(['/a', '/a/b', '/a/b/c', '/d']), set(body['data']))
+
+    def test_enumerate_subtree(self):
+        status, body = self.request('/a/enumerate')
+        self.assertEqual(
+            {'/a': {'x': 1}, '/a/b': {'x': 2}, '/a/b/c': {'x': 3}},
+            body['data'])
+
+    def test_enumerate_depth(self):
+        status, body = self.request('/a/enumerate', 'depth=1')
+        self.assertEqual(set(['/a', '/a/b']), set(body['data']))
+
+    def test_paging(self):
+        pages = []
+        for offset in (0, 2):
+            status, body = self.request(
+                '/list', 'offset={}&limit=2'.format(offset))
+            self.assertEqual(2, len(body['data']))
+            pages.extend(body['data'])
+        self.assertEqual(set(['/a', '/a/b', '/a/b/c', '/d']), set(pages))
+
+    def test_bad_param(self):
+        status, body = self.request('/list', 'limit=x')
+        self.assertEqual('400 Bad Request', status)
+        self.assertEqual(
+            "Invalid value for 'limit': 'x'", body['data']['description'])
+        status, body = self.request('/list', 'depth=-2')
+        self.assertEqual(
+            "Invalid value for 'depth': '-2'", body['data']['description'])
+
+    def test_chunked(self):
+        for i in range(0, 1000):
+            self.tree['/e/{}'.format(i)] = {'x': i}
+        app = PathTreeApp(self.tree, chunk_size=1024)
+        environ = {'PATH_INFO': '/e/enumerate'}
+        setup_testing_defaults(environ)
+        chunks = list(app(environ, lambda s, h: None))
+        self.assertGreater(len(chunks), 1)
+        body = json.loads(b''.join(chunks).decode('utf-8'))
+        self.assertEqual(1000, len(body['data']))
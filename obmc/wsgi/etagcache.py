@@ -0,0 +1,181 @@
+# Contributors Listed Below - COPYRIGHT 2016
+# [+] International Business Machines Corp.
+#
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied. See the License for the specific language governing
+# permissions and limitations under the License.
+
+import collections
+import threading
+
+
+class ETagCache(object):
+    ''' WSGI middleware caching the serialized GET responses of app.
+
+    Responses are cached per (path, query string) and tagged with an
+    ETag derived from version, a callable returning a value that changes
+    whenever the data behind app may have changed -- for a PathTreeApp,
+    lambda: tree.version.  PathTree.version only changes when a path is
+    set, deleted or demoted, so code modifying a value in place must
+    call tree.touch() afterwards, or cached responses go stale.
+
+    A request whose If-None-Match matches the current ETag is answered
+    with 304 Not Modified without calling app; a cached response at the
+    current version is replayed without re-serializing anything.
+    If-None-Match: * is answered with 304 only if the resource exists.
+
+    Cached bodies are held to a total of max_bytes, least recently used
+    first out.  Responses larger than max_entry_bytes (max_bytes / 8 by
+    default) are streamed through uncached.
+    '''
+
+    def __init__(self, app, version, max_bytes=4 * 1024 * 1024,
+                 max_entry_bytes=None):
+        self.app = app
+        self.version = version
+        self.max_bytes = max_bytes
+        if max_entry_bytes is None:
+            max_entry_bytes = max_bytes // 8
+        self.max_entry_bytes = min(max_entry_bytes, max_bytes)
+        self.entries = collections.OrderedDict()
+        self.size = 0
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+
+    @staticmethod
+    def _etag(version):
+        return '"{}"'.format(version)
+
+    @staticmethod
+    def _tags(header):
+        if header is None:
+            return []
+        tags = [x.strip() for x in header.split(',')]
+        # weak comparison, per RFC 7232 section 3.2
+        return [x[2:] if x.startswith('W/') else x for x in tags]
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.size = 0
+
+    def _get(self, key, version):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] != version:
+                del self.entries[key]
+                self.size -= len(entry[3])
+                return None
+            # TODO: openbmc/openbmc#2994 remove python 2 support
+            # (OrderedDict.move_to_end)
+            del self.entries[key]
+            self.entries[key] = entry
+            return entry
+
+    def _put(self, key, entry):
+        with self.lock:
+            old = self.entries.pop(key, None)
+            if old is not None:
+                self.size -= len(old[3])
+            self.entries[key] = entry
+            self.size += len(entry[3])
+            while self.size > self.max_bytes:
+                _, evicted = self.entries.popitem(last=False)
+                self.size -= len(evicted[3])
+
+    def _stream(self, key, version, response, body):
+        chunks = []
+        size = 0
+        try:
+            for chunk in body:
+                if chunks is not None:
+                    size += len(chunk)
+                    if size > self.max_entry_bytes:
+                        chunks = None
+                    else:
+                        chunks.append(chunk)
+                yield chunk
+        finally:
+            if hasattr(body, 'close'):
+                body.close()
+
+        if chunks is not None and response:
+            status, headers = response
+            self._put(key, (version, status, headers, b''.join(chunks)))
+
+    def _exists(self, environ):
+        response = []
+
+        def start_response(status, headers, exc_info=None):
+            response[:] = [status]
+            return lambda data: None
+
+        body = self.app(environ, start_response)
+        try:
+            for _ in body:
+                pass
+        finally:
+            if hasattr(body, 'close'):
+                body.close()
+        return bool(response) and response[0].startswith('200')
+
+    def __call__(self, environ, start_response):
+        method = environ.get('REQUEST_METHOD', 'GET')
+        if method not in ('GET', 'HEAD'):
+            return self.app(environ, start_response)
+
+        version = self.version()
+        etag = self._etag(version)
+        tags = self._tags(environ.get('HTTP_IF_NONE_MATCH'))
+        if etag in tags:
+            self.not_modified += 1
+            start_response('304 Not Modified', [('ETag', etag)])
+            return []
+
+        key = (environ.get('PATH_INFO', ''), environ.get('QUERY_STRING', ''))
+        entry = self._get(key, version)
+        if '*' in tags:
+            # Only 200 responses are cached, so an entry proves the
+            # resource exists; otherwise ask app.
+            if entry is not None or self._exists(environ):
+                self.not_modified += 1
+                start_response('304 Not Modified', [('ETag', etag)])
+                return []
+            return self.app(environ, start_response)
+
+        if entry is not None:
+            self.hits += 1
+            _, status, headers, body = entry
+            start_response(status, headers + [
+                ('ETag', etag), ('Content-Length', str(len(body)))])
+            return [] if method == 'HEAD' else [body]
+
+        self.misses += 1
+        response = []
+
+        def caching_start_response(status, headers, exc_info=None):
+            if status.startswith('200') and method == 'GET':
+                del response[:]
+                response.extend((status, [
+                    x for x in headers
+                    if x[0].lower() not in ('content-length', 'etag')]))
+                headers = list(headers) + [('ETag', etag)]
+            if exc_info is None:
+                return start_response(status, headers)
+            return start_response(status, headers, exc_info)
+
+        body = self.app(environ, caching_start_response)
+        return self._stream(key, version, response, body)
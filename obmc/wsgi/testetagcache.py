@@ -0,0 +1,172 @@
+import json
+import unittest
+from wsgiref.util import setup_testing_defaults
+from wsgiref.validate import validator
+
+from obmc.utils.pathtree import PathTree
+from .apps.pathtreeapp import PathTreeApp
+from .etagcache import ETagCache
+
+
+class CountingApp(object):
+    def __init__(self, app):
+        self.app = app
+        self.calls = 0
+
+    def __call__(self, environ, start_response):
+        self.calls += 1
+        return self.app(environ, start_response)
+
+
+def request(app, path, query='', headers=None, method='GET'):
+    environ = {
+        'PATH_INFO': path, 'QUERY_STRING': query, 'SCRIPT_NAME': '',
+        'REQUEST_METHOD': method}
+    environ.update(headers or {})
+    setup_testing_defaults(environ)
+    result = {}
+
+    def start_response(status, headers, exc_info=None):
+        result['status'] = status
+        result['headers'] = dict(headers)
+
+    body_iter = validator(app)(environ, start_response)
+    try:
+        body = b''.join(body_iter)
+    finally:
+        body_iter.close()
+    return result['status'], result['headers'], body
+
+
+class ETagCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.tree = PathTree()
+        self.tree['/a'] = {'x': 1}
+        self.tree['/a/b'] = {'x': 2}
+        self.inner = CountingApp(PathTreeApp(self.tree))
+        self.app = ETagCache(self.inner, lambda: self.tree.version)
+
+    def test_etag(self):
+        status, headers, body = request(self.app, '/a/enumerate')
+        self.assertEqual('200 OK', status)
+        self.assertIn('ETag', headers)
+        self.assertEqual(2, len(json.loads(body.decode('utf-8'))['data']))
+
+    def test_cached(self):
+        first = request(self.app, '/a/enumerate')
+        second = request(self.app, '/a/enumerate')
+        self.assertEqual(1, self.inner.calls)
+        self.assertEqual(first[2], second[2])
+        self.assertEqual(first[1]['ETag'], second[1]['ETag'])
+        self.assertEqual(str(len(second[2])), second[1]['Content-Length'])
+
+    def test_query_key(self):
+        request(self.app, '/a/enumerate')
+        request(self.app, '/a/enumerate', 'depth=0')
+        self.assertEqual(2, self.inner.calls)
+
+    def test_not_modified(self):
+        _, headers, _ = request(self.app, '/a')
+        status, _, body = request(
+            self.app, '/a', headers={'HTTP_IF_NONE_MATCH': headers['ETag']})
+        self.assertEqual('304 Not Modified', status)
+        self.assertEqual(b'', body)
+        self.assertEqual(1, self.inner.calls)
+
+    def test_not_modified_star(self):
+        status, _, _ = request(
+            self.app, '/a', headers={'HTTP_IF_NONE_MATCH': '*'})
+        self.assertEqual('304 Not Modified', status)
+        status, _, _ = request(
+            self.app, '/nope', headers={'HTTP_IF_NONE_MATCH': '*'})
+        self.assertEqual('404 Not Found', status)
+
+    def test_in_place_change_needs_touch(self):
+        _, headers, _ = request(self.app, '/a')
+        self.tree['/a']['x'] = 5
+        self.tree.touch()
+        status, _, body = request(
+            self.app, '/a', headers={'HTTP_IF_NONE_MATCH': headers['ETag']})
+        self.assertEqual('200 OK', status)
+        self.assertEqual(5, json.loads(body.decode('utf-8'))['data']['x'])
+
+    def test_not_modified_weak(self):
+        _, headers, _ = request(self.app, '/a')
+        status, _, _ = request(self.app, '/a', headers={
+            'HTTP_IF_NONE_MATCH': '"x", W/' + headers['ETag']})
+        self.assertEqual('304 Not Modified', status)
+
+    def test_modified(self):
+        _, headers, _ = request(self.app, '/a/enumerate')
+        self.tree['/a/c'] = {'x': 3}
+        status, new_headers, body = request(
+            self.app, '/a/enumerate',
+            headers={'HTTP_IF_NONE_MATCH': headers['ETag']})
+        self.assertEqual('200 OK', status)
+        self.assertNotEqual(headers['ETag'], new_headers['ETag'])
+        self.assertEqual(3, len(json.loads(body.decode('utf-8'))['data']))
+        self.assertEqual(2, self.inner.calls)
+
+    def test_errors_uncached(self):
+        request(self.app, '/nope')
+        status, headers, _ = request(self.app, '/nope')
+        self.assertEqual('404 Not Found', status)
+        self.assertNotIn('ETag', headers)
+        self.assertEqual(2, self.inner.calls)
+
+    def test_head(self):
+        request(self.app, '/a')
+        status, headers, body = request(self.app, '/a', method='HEAD')
+        self.assertEqual('200 OK', status)
+        self.assertEqual(b'', body)
+        self.assertNotEqual('0', headers['Content-Length'])
+
+    def test_evict(self):
+        for i in range(0, 100):
+            self.tree['/e/{}'.format(i)] = {'x': i}
+        self.app = ETagCache(
+            self.inner, lambda: self.tree.version, max_bytes=512,
+            max_entry_bytes=512)
+        for i in range(0, 100):
+            request(self.app, '/e/{}'.format(i))
+        self.assertLessEqual(self.app.size, 512)
+        self.assertLess(len(self.app.entries), 100)
+        self.assertEqual(
+            self.app.size, sum(len(x[3]) for x in self.app.entries.values()))
+
+    def test_entry_too_large(self):
+        for i in range(0, 100):
+            self.tree['/e/{}'.format(i)] = {'x': i}
+        self.app = ETagCache(
+            self.inner, lambda: self.tree.version, max_bytes=256)
+        status, _, body = request(self.app, '/e/enumerate')
+        self.assertEqual(100, len(json.loads(body.decode('utf-8'))['data']))
+        self.assertEqual(0, len(self.app.entries))
+
+
+if __name__ == '__main__':
+    import timeit
+
+    setup = """\
+from obmc.utils.pathtree import PathTree
+from obmc.wsgi.apps.pathtreeapp import PathTreeApp
+from obmc.wsgi.etagcache import ETagCache
+from obmc.wsgi.testetagcache import request
+tree = PathTree()
+for i in range(0, {}):
+    tree['/xyz/openbmc_project/inventory/item{{}}'.format(i)] = {{
+        'Present': True, 'PrettyName': 'item', 'Index': i}}
+plain = PathTreeApp(tree)
+cached = ETagCache(plain, lambda: tree.version, max_bytes=64 * 1024 * 1024,
+                   max_entry_bytes=64 * 1024 * 1024)
+_, headers, _ = request(cached, '/enumerate')
+match = {{'HTTP_IF_NONE_MATCH': headers['ETag']}}
+"""
+
+    for n in (100, 1000, 10000):
+        for label, stmt in (
+                ('uncached', "request(plain, '/enumerate')"),
+                ('cached', "request(cached, '/enumerate')"),
+                ('304', "request(cached, '/enumerate', headers=match)")):
+            t = timeit.timeit(stmt, setup=setup.format(n), number=20)
+            print('{} objects, {}: {:.3f} ms'.format(n, label, t / 20 * 1000))